@@ -0,0 +1,349 @@
+import asyncio
+import base64
+import json
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from io import BytesIO
+
+from openai import AsyncOpenAI
+from PIL import Image
+from playwright.async_api import Error as PlaywrightError, async_playwright
+
+from example1 import (
+    DOM_QUIET_MS,
+    FRAME_INTERVAL_MS,
+    MAX_CAPTURE_FRAMES,
+    MIME_TYPES,
+    SCREENSHOT_FORMAT,
+    SCREENSHOT_QUALITY,
+    WAIT_ACTION_TIMEOUT_MS,
+    WAIT_FOR_DOM_QUIET,
+    StepTimer,
+    input_messages,
+    remaining_ms,
+    settle_deadline,
+    tools,
+)
+from llmMeter import BudgetExceeded, metered, print_stats as print_llm_usage
+
+TRACE_DIR = "traces"
+# Browser contexts driven at once, and model calls in flight across all of them
+SESSIONS = 8
+MODEL_CONCURRENCY = 8
+MAX_STEPS = 30
+MAX_SECONDS = 300
+VIEWPORT = {"width": 1024, "height": 768}
+
+
+@dataclass
+class Task:
+    task_id: str
+    prompt: str
+    start_url: str = "https://bing.com"
+    max_steps: int = MAX_STEPS
+    max_seconds: float = MAX_SECONDS
+
+
+@dataclass
+class TaskResult:
+    task_id: str
+    status: str  # done, max_steps, timeout, budget or error
+    steps: int = 0
+    seconds: float = 0.0
+    output_text: str = ""
+    error: str = ""
+    phases: dict = field(default_factory=dict)
+
+
+# === Async page helpers ===
+async def get_screenshot(page, fmt=SCREENSHOT_FORMAT, quality=SCREENSHOT_QUALITY):
+    if fmt == "jpeg":
+        return await page.screenshot(type="jpeg", quality=quality)
+    png = await page.screenshot()
+    if fmt == "png":
+        return png
+    buffer = BytesIO()
+    Image.open(BytesIO(png)).save(buffer, format=fmt.upper(), quality=quality)
+    return buffer.getvalue()
+
+
+# Awaitable twins of example1.wait_for_dom_quiet and capture_stable_frame;
+# the Playwright sync and async APIs can't share one body, so these mirror
+# them line for line and take every limit from example1.
+async def wait_for_dom_quiet(page, quiet_ms=DOM_QUIET_MS, deadline=None):
+    deadline = deadline or settle_deadline()
+    try:
+        await page.wait_for_load_state(
+            "domcontentloaded", timeout=remaining_ms(deadline)
+        )
+        await page.evaluate(WAIT_FOR_DOM_QUIET, [quiet_ms, remaining_ms(deadline)])
+    except PlaywrightError:
+        # A navigation replaced the document mid-wait; wait for the new one
+        try:
+            await page.wait_for_load_state(
+                "domcontentloaded", timeout=remaining_ms(deadline)
+            )
+        except PlaywrightError:
+            # Still loading; capture whatever is on screen
+            pass
+
+
+async def capture_stable_frame(page, deadline=None) -> bytes:
+    """
+    Screenshot once two consecutive frames are pixel-identical, or the latest
+    frame once the deadline passes or MAX_CAPTURE_FRAMES have been taken.
+    """
+    deadline = deadline or settle_deadline()
+    frame = await get_screenshot(page)
+    for _ in range(MAX_CAPTURE_FRAMES - 1):
+        if time.monotonic() + FRAME_INTERVAL_MS / 1000 >= deadline:
+            break
+        await asyncio.sleep(FRAME_INTERVAL_MS / 1000)
+        next_frame = await get_screenshot(page)
+        if next_frame == frame:
+            break
+        frame = next_frame
+    return frame
+
+
+async def handle_model_action(context, page, action, log=print):
+    """Async counterpart of example1.handle_model_action, scoped to one context."""
+    try:
+        # Check if the task opened a new tab and switch to it
+        if len(context.pages) > 1 and context.pages[-1] != page:
+            page = context.pages[-1]
+            log("Switched to new page/tab")
+
+        match action.type:
+            case "click":
+                log(f"Clicking at ({action.x}, {action.y}) with button {action.button}")
+                await page.mouse.click(action.x, action.y, button=action.button)
+
+            case "scroll":
+                log(
+                    f"Action: scroll at ({action.x}, {action.y}) with offsets "
+                    f"(scroll_x={action.scroll_x}, scroll_y={action.scroll_y})"
+                )
+                await page.mouse.move(action.x, action.y)
+                await page.evaluate(
+                    f"window.scrollBy({action.scroll_x}, {action.scroll_y})"
+                )
+
+            case "keypress":
+                for k in action.keys:
+                    log(f"Action: keypress '{k}'")
+                    if k.lower() == "enter":
+                        await page.keyboard.press("Enter")
+                    elif k.lower() == "space":
+                        await page.keyboard.press(" ")
+                    else:
+                        await page.keyboard.press(k)
+
+            case "type":
+                log(f"Action: type text: {action.text}")
+                await page.keyboard.type(action.text)
+
+            case "wait":
+                log("Action: wait")
+                await wait_for_dom_quiet(
+                    page, deadline=settle_deadline(WAIT_ACTION_TIMEOUT_MS)
+                )
+
+            case _:
+                log(f"Unrecognized action: {action}")
+
+    except PlaywrightError as e:
+        log(f"Error handling action {action}: {e}")
+    return page
+
+
+# === Runner ===
+class TaskRunner:
+    """
+    Runs computer-use tasks concurrently, each in its own context of one shared
+    browser. A global semaphore caps model calls in flight, so sessions beyond
+    the model's rate limit wait instead of piling up 429s.
+    """
+
+    def __init__(
+        self,
+        sessions=SESSIONS,
+        model_concurrency=MODEL_CONCURRENCY,
+        trace_dir=TRACE_DIR,
+        headless=True,
+        client=None,
+    ):
+        self.sessions = asyncio.Semaphore(sessions)
+        self.model_calls = asyncio.Semaphore(model_concurrency)
+        self.trace_dir = trace_dir
+        self.headless = headless
+        self.client = client or metered(AsyncOpenAI(), "asyncRunner")
+        self.browser = None
+
+    async def create_response(self, timer, **kwargs):
+        async with self.model_calls:
+            start = time.perf_counter()
+            try:
+                return await self.client.responses.create(
+                    model="computer-use-preview",
+                    tools=tools,
+                    truncation="auto",
+                    **kwargs,
+                )
+            finally:
+                timer.phases["model"].append(time.perf_counter() - start)
+
+    async def _loop(self, task, context, page, trace, timer, result):
+        async def timed(phase, coro):
+            start = time.perf_counter()
+            try:
+                return await coro
+            finally:
+                timer.phases[phase].append(time.perf_counter() - start)
+
+        def log(message):
+            print(f"[{task.task_id}] {message}")
+
+        await page.goto(task.start_url, wait_until="domcontentloaded")
+        response = await self.create_response(
+            timer,
+            input=[{"role": "user", "content": task.prompt}],
+            reasoning={"generate_summary": "concise"},
+        )
+        mime_type = MIME_TYPES[SCREENSHOT_FORMAT]
+        previous_frame, image_url = None, None
+        while True:
+            computer_calls = [i for i in response.output if i.type == "computer_call"]
+            if not computer_calls:
+                result.status = "done"
+                result.output_text = response.output_text
+                return
+            if result.steps >= task.max_steps:
+                result.status = "max_steps"
+                return
+
+            computer_call = computer_calls[0]
+            action = computer_call.action
+            page = await timed("act", handle_model_action(context, page, action, log))
+            deadline = settle_deadline()
+            await timed("settle", wait_for_dom_quiet(page, deadline=deadline))
+            frame = await timed("capture", capture_stable_frame(page, deadline))
+            if frame != previous_frame:
+                encoded = base64.b64encode(frame).decode("ascii")
+                image_url = f"data:{mime_type};base64,{encoded}"
+                previous_frame = frame
+
+            response = await self.create_response(
+                timer,
+                previous_response_id=response.id,
+                input=[
+                    {
+                        "call_id": computer_call.call_id,
+                        "type": "computer_call_output",
+                        "output": {"type": "input_image", "image_url": image_url},
+                    }
+                ],
+            )
+            result.steps += 1
+            trace.write(
+                json.dumps(
+                    {
+                        "step": result.steps,
+                        "action": action.model_dump(),
+                        "url": page.url,
+                        "frame_bytes": len(frame),
+                        "response_id": response.id,
+                        "phases": {p: round(v[-1], 3) for p, v in timer.phases.items()},
+                    }
+                )
+                + "\n"
+            )
+            trace.flush()
+
+    async def run_task(self, task: Task) -> TaskResult:
+        result = TaskResult(task.task_id, status="error")
+        timer = StepTimer()
+        async with self.sessions:
+            start = time.perf_counter()
+            context = await self.browser.new_context(viewport=VIEWPORT)
+            path = os.path.join(self.trace_dir, f"{task.task_id}.jsonl")
+            with open(path, "w", encoding="utf-8") as trace:
+                try:
+                    page = await context.new_page()
+                    await asyncio.wait_for(
+                        self._loop(task, context, page, trace, timer, result),
+                        timeout=task.max_seconds,
+                    )
+                except asyncio.TimeoutError:
+                    result.status = "timeout"
+                except BudgetExceeded as e:
+                    result.status, result.error = "budget", str(e)
+                except Exception as e:
+                    result.status, result.error = "error", f"{type(e).__name__}: {e}"
+                finally:
+                    await context.close()
+                    result.seconds = round(time.perf_counter() - start, 2)
+                    result.phases = {
+                        phase: round(sum(values), 2)
+                        for phase, values in timer.phases.items()
+                    }
+                    # The last line of every trace is the task's result
+                    trace.write(json.dumps({"result": asdict(result)}) + "\n")
+        print(f"[{task.task_id}] {result.status} after {result.steps} steps")
+        return result
+
+    async def run(self, tasks) -> list:
+        os.makedirs(self.trace_dir, exist_ok=True)
+        async with async_playwright() as p:
+            self.browser = await p.chromium.launch(
+                headless=self.headless,
+                chromium_sandbox=True,
+                env={},
+                args=["--disable-extensions", "--disable-file-system"],
+            )
+            try:
+                return await asyncio.gather(*(self.run_task(t) for t in tasks))
+            finally:
+                await self.browser.close()
+
+
+def load_tasks(path) -> list:
+    """One JSON object per line with task_id, prompt and optionally start_url and limits."""
+    with open(path, encoding="utf-8") as f:
+        return [Task(**json.loads(line)) for line in f if line.strip()]
+
+
+def report(results, seconds):
+    for r in results:
+        print(
+            f"{r.task_id:<20}{r.status:<10}{r.steps:>6}{r.seconds:>9.1f}s  {r.phases}"
+        )
+    steps = sum(r.steps for r in results)
+    print(
+        f"{len(results)} tasks, {steps} steps in {seconds:.1f}s: "
+        f"{len(results) / seconds * 60:.1f} tasks/min, {steps / seconds:.2f} steps/s"
+    )
+
+
+if __name__ == "__main__":
+    # asyncRunner.py [tasks.jsonl] [--sessions N] [--model-concurrency N]
+    args = sys.argv[1:]
+
+    def option(flag, default):
+        return int(args[args.index(flag) + 1]) if flag in args else default
+
+    files = [a for a in args if a.endswith(".jsonl")]
+    if files:
+        tasks = load_tasks(files[0])
+    else:
+        tasks = [Task("example1", input_messages[0]["content"])]
+    runner = TaskRunner(
+        sessions=option("--sessions", SESSIONS),
+        model_concurrency=option("--model-concurrency", MODEL_CONCURRENCY),
+    )
+    start = time.perf_counter()
+    results = asyncio.run(runner.run(tasks))
+    report(results, time.perf_counter() - start)
+    print_llm_usage()
@@ -1,16 +1,29 @@
 from openai import OpenAI
 from dotenv import load_dotenv
 import os
+import sys
 
 # https://www.youtube.com/watch?v=Tm1_KHdh_kA&list=PL4HikwTaYE0EWV3qieOYooyxb9osQLgou&index=1&t=233s
 load_dotenv()
 
-from playwright.sync_api import sync_playwright
+from playwright.sync_api import Error as PlaywrightError, sync_playwright
 import base64
+import queue
+import threading
 import time
+from collections import defaultdict
 from PIL import Image
 from io import BytesIO
 
+# Shared usage meter and budget governor (stdlib only)
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "..", "unfpa-partners", "src"
+    ),
+)
+from llmMeter import BudgetExceeded, metered, percentile, print_stats as print_llm_usage
+
 # Load environment variables
 HOME_DIR = os.path.expanduser("~")
 load_dotenv(f"{HOME_DIR}/.env")
@@ -36,8 +49,83 @@ tools = [
     }
 ]
 
-# OpenAI client
-client = OpenAI()
+# OpenAI client; every call is metered (set LLM_BUDGET_USD to cap a run)
+client = metered(OpenAI(), "example1.computer_use")
+
+# Screenshots: png, jpeg or webp; quality applies to the lossy formats
+SCREENSHOT_FORMAT = os.getenv("SCREENSHOT_FORMAT", "jpeg")
+SCREENSHOT_QUALITY = int(os.getenv("SCREENSHOT_QUALITY", "70"))
+MIME_TYPES = {"png": "image/png", "jpeg": "image/jpeg", "webp": "image/webp"}
+# Open each screenshot in the OS image viewer (on a background thread)
+SHOW_SCREENSHOTS = os.getenv("SHOW_SCREENSHOTS") == "1"
+
+# Settle: the page counts as settled once the DOM has been quiet for
+# DOM_QUIET_MS and two frames FRAME_INTERVAL_MS apart are identical.
+# Settling and capture share one SETTLE_TIMEOUT_MS budget per step, so a
+# page that never stops animating costs no more than the old 1 s sleep.
+SETTLE_TIMEOUT_MS = 1000
+WAIT_ACTION_TIMEOUT_MS = 2000
+DOM_QUIET_MS = 200
+FRAME_INTERVAL_MS = 150
+MAX_CAPTURE_FRAMES = 4
+
+WAIT_FOR_DOM_QUIET = """
+([quietMs, timeoutMs]) => new Promise((resolve) => {
+    let timer;
+    const done = () => { observer.disconnect(); clearTimeout(deadline); resolve(); };
+    const observer = new MutationObserver(() => {
+        clearTimeout(timer);
+        timer = setTimeout(done, quietMs);
+    });
+    observer.observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+    timer = setTimeout(done, quietMs);
+    const deadline = setTimeout(done, timeoutMs);
+})
+"""
+
+
+class ScreenshotViewer:
+    """Shows frames without blocking the loop; frames arriving while busy replace each other."""
+
+    def __init__(self):
+        self.frames = queue.Queue(maxsize=1)
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        while True:
+            Image.open(BytesIO(self.frames.get())).show()
+
+    def show(self, frame):
+        try:
+            self.frames.get_nowait()
+        except queue.Empty:
+            pass
+        self.frames.put_nowait(frame)
+
+
+class StepTimer:
+    """Seconds spent per phase of each loop step."""
+
+    def __init__(self):
+        self.phases = defaultdict(list)
+
+    def time(self, phase, fn, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.phases[phase].append(time.perf_counter() - start)
+
+    def report(self):
+        print(
+            f"{'phase':<10}{'steps':>6}{'mean_s':>9}{'p50_s':>9}{'p95_s':>9}{'total_s':>9}"
+        )
+        for phase, values in self.phases.items():
+            print(
+                f"{phase:<10}{len(values):>6}{sum(values) / len(values):>9.3f}"
+                f"{percentile(values, 0.5):>9.3f}{percentile(values, 0.95):>9.3f}"
+                f"{sum(values):>9.2f}"
+            )
 
 
 def show_image(base_64_image):
@@ -46,11 +134,60 @@ def show_image(base_64_image):
     image.show()
 
 
-def get_screenshot(page):
+def get_screenshot(page, fmt=SCREENSHOT_FORMAT, quality=SCREENSHOT_QUALITY):
     """
-    Take a full-page screenshot using Playwright and return the image bytes.
+    Screenshot of the viewport, compressed. JPEG is encoded by the browser;
+    WebP is converted from PNG with Pillow.
     """
-    return page.screenshot()
+    if fmt == "jpeg":
+        return page.screenshot(type="jpeg", quality=quality)
+    png = page.screenshot()
+    if fmt == "png":
+        return png
+    buffer = BytesIO()
+    Image.open(BytesIO(png)).save(buffer, format=fmt.upper(), quality=quality)
+    return buffer.getvalue()
+
+
+def settle_deadline(timeout_ms=SETTLE_TIMEOUT_MS) -> float:
+    return time.monotonic() + timeout_ms / 1000
+
+
+def remaining_ms(deadline: float) -> int:
+    # Playwright treats a timeout of 0 as "no timeout", so never go below 1 ms
+    return max(1, int((deadline - time.monotonic()) * 1000))
+
+
+def wait_for_dom_quiet(page, quiet_ms=DOM_QUIET_MS, deadline=None):
+    deadline = deadline or settle_deadline()
+    try:
+        page.wait_for_load_state("domcontentloaded", timeout=remaining_ms(deadline))
+        page.evaluate(WAIT_FOR_DOM_QUIET, [quiet_ms, remaining_ms(deadline)])
+    except PlaywrightError:
+        # A navigation replaced the document mid-wait; wait for the new one
+        try:
+            page.wait_for_load_state("domcontentloaded", timeout=remaining_ms(deadline))
+        except PlaywrightError:
+            # Still loading; capture whatever is on screen, like the old fixed sleep
+            pass
+
+
+def capture_stable_frame(page, deadline=None) -> bytes:
+    """
+    Screenshot once two consecutive frames are pixel-identical, or the latest
+    frame once the deadline passes or MAX_CAPTURE_FRAMES have been taken.
+    """
+    deadline = deadline or settle_deadline()
+    frame = get_screenshot(page)
+    for _ in range(MAX_CAPTURE_FRAMES - 1):
+        if time.monotonic() + FRAME_INTERVAL_MS / 1000 >= deadline:
+            break
+        page.wait_for_timeout(FRAME_INTERVAL_MS)
+        next_frame = get_screenshot(page)
+        if next_frame == frame:
+            break
+        frame = next_frame
+    return frame
 
 
 def handle_model_action(browser, page, action):
@@ -98,7 +235,9 @@ def handle_model_action(browser, page, action):
 
             case "wait":
                 print(f"Action: wait")
-                time.sleep(2)
+                wait_for_dom_quiet(
+                    page, deadline=settle_deadline(WAIT_ACTION_TIMEOUT_MS)
+                )
 
             case _:
                 print(f"Unrecognized action: {action}")
@@ -110,7 +249,11 @@ def handle_model_action(browser, page, action):
         return page  # Return the original page
 
 
-def computer_use_loop(browser, page, response):
+def computer_use_loop(browser, page, response, timer=None):
+    timer = timer or StepTimer()
+    viewer = ScreenshotViewer() if SHOW_SCREENSHOTS else None
+    mime_type = MIME_TYPES[SCREENSHOT_FORMAT]
+    previous_frame, image_url = None, None
     while True:
         computer_calls = [
             item for item in response.output if item.type == "computer_call"
@@ -126,14 +269,24 @@ def computer_use_loop(browser, page, response):
         last_call_id = computer_call.call_id
         action = computer_call.action
 
-        page = handle_model_action(browser, page, action)
-        time.sleep(1)
-
-        screenshot_bytes = get_screenshot(page)
-        screenshot_base64 = base64.b64encode(screenshot_bytes).decode("utf-8")
-        show_image(screenshot_base64)
-
-        response = client.responses.create(
+        page = timer.time("act", handle_model_action, browser, page, action)
+        deadline = settle_deadline()
+        timer.time("settle", wait_for_dom_quiet, page, deadline=deadline)
+        frame = timer.time("capture", capture_stable_frame, page, deadline=deadline)
+
+        # An unchanged screen is sent again as is, without re-encoding or display
+        if frame != previous_frame:
+            screenshot_base64 = timer.time("encode", base64.b64encode, frame)
+            image_url = f"data:{mime_type};base64,{screenshot_base64.decode('ascii')}"
+            if viewer:
+                viewer.show(frame)
+            previous_frame = frame
+        else:
+            print("Screen unchanged since the previous step")
+
+        response = timer.time(
+            "model",
+            client.responses.create,
             model="computer-use-preview",
             previous_response_id=response.id,
             tools=tools,
@@ -143,7 +296,7 @@ def computer_use_loop(browser, page, response):
                     "type": "computer_call_output",
                     "output": {
                         "type": "input_image",
-                        "image_url": f"data:image/png;base64,{screenshot_base64}",
+                        "image_url": image_url,
                     },
                 }
             ],
@@ -181,11 +334,17 @@ def main():
 
         print(response.output)
 
-        final_response = computer_use_loop(browser, page, response)
-        print("Final response: ", final_response.output_text)
+        timer = StepTimer()
+        try:
+            final_response = computer_use_loop(browser, page, response, timer)
+            print("Final response: ", final_response.output_text)
+        except BudgetExceeded as e:
+            print(f"Stopping: {e}")
+        timer.report()
 
         # Close the browser
         browser.close()
+    print_llm_usage()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,245 @@
+import json
+import os
+import sys
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+import dataCatalog
+from countries import country_table, to_slug
+from dataCatalog import DATA_DIR
+
+CUBE_DIR = os.path.join(DATA_DIR, "processed", "cube")
+CUBE_PATH = os.path.join(CUBE_DIR, "cube.parquet")
+MANIFEST_PATH = os.path.join(CUBE_DIR, "manifest.json")
+
+INDEX = ["Country", "Year", "Program"]
+MONEY_COLUMNS = ["Total Spending", "UNFPA", "GOV", "NGO", "UN"]
+SHARE_COLUMNS = {"%UNFPA": "UNFPA", "%GOV": "GOV", "%NGO": "NGO", "%UN": "UN"}
+# SWOP 2024 snapshot, one value per country
+OUTCOME_COLUMNS = {
+    "MMR per 100,000": "MMR_2024",
+    "Births_Attended": "Births_Attended",
+    "Modern_Con_All": "Modern_Con_All",
+    "Unmet_Need_Fam_plan_All": "Unmet_Need_Fam_plan_All",
+    "UHC_Index": "UHC_Index",
+}
+# Per-year MMR: UNICEF 2000-2024 when Excel is readable, else the UNFPA SDG series
+MMR_TABLES = ["unicef_mmr", "maternal_deaths"]
+
+# Per-country-year denominator -> derived spending ratio
+RATIO_DENOMINATORS = {
+    "Population": "Spending_per_capita",
+    "MMR": "Spending_per_MMR_point",
+}
+# Bumped when build logic changes, so existing cubes are rebuilt
+CUBE_VERSION = 2
+
+# name: group-by columns, precomputed at build time
+ROLLUPS = {
+    "continent": ["Continent"],
+    "program": ["Program"],
+    "year": ["Year"],
+    "continent_year": ["Continent", "Year"],
+    "program_year": ["Program", "Year"],
+    "continent_program": ["Continent", "Program"],
+}
+
+
+# === Build ===
+def _by_country_year(df: pd.DataFrame, value: str) -> pd.Series:
+    df = df.assign(Country=to_slug(df.Country_Name)).dropna(subset=["Country"])
+    return df.groupby(["Country", "Year"])[value].mean()
+
+
+def load_mmr() -> tuple:
+    """(Country, Year) -> MMR series, and the catalog table it came from."""
+    for name in MMR_TABLES:
+        try:
+            return _by_country_year(dataCatalog.load(name), "MMR"), name
+        except (FileNotFoundError, ImportError):
+            continue
+    raise FileNotFoundError("No MMR series available")
+
+
+def derive(df: pd.DataFrame) -> pd.DataFrame:
+    """Shares and per-capita/per-MMR-point spending; works on cube rows and rollups."""
+    total = df["Total Spending"].astype("float64").replace(0, np.nan)
+    for share, column in SHARE_COLUMNS.items():
+        df[share] = df[column] / total
+    df["Spending_per_capita"] = df["Total Spending"] / df["Population"]
+    df["Spending_per_MMR_point"] = df["Total Spending"] / df["MMR"]
+    return df
+
+
+def build_cube() -> pd.DataFrame:
+    """Fundings by (country, year, program), joined to every country and country-year dimension."""
+    fundings = dataCatalog.load("fundings")
+    df = fundings.astype({"Country": "string", "Program": "string"})
+    df = df[INDEX + MONEY_COLUMNS].copy()
+    for column in MONEY_COLUMNS:
+        df[column] = df[column].astype("float64")
+
+    countries = country_table()
+    df["Country_Name"] = df.Country.map(countries.Country_Name)
+    df["Continent"] = df.Country.map(countries.Continent)
+
+    outcomes = dataCatalog.load("outcomes").set_index("Country")
+    outcomes = outcomes[list(OUTCOME_COLUMNS)].rename(columns=OUTCOME_COLUMNS)
+    df = df.join(outcomes, on="Country")
+
+    population = _by_country_year(dataCatalog.load("population"), "Population")
+    mmr, mmr_source = load_mmr()
+    keys = pd.MultiIndex.from_frame(df[["Country", "Year"]])
+    df["Population"] = population.reindex(keys).to_numpy()
+    df["MMR"] = mmr.reindex(keys).to_numpy()
+
+    df = derive(df)
+    for column in ["Country", "Program", "Country_Name", "Continent"]:
+        df[column] = df[column].astype("category")
+    df = df.set_index(INDEX).sort_index()
+    df.attrs["mmr_source"] = mmr_source
+    return df
+
+
+def aggregate_frame(df: pd.DataFrame, by) -> pd.DataFrame:
+    """
+    Sum money over `by` and recompute the derived metrics from the sums.
+    Population and MMR are per country-year, so each country-year counts once
+    however many programs it has. Per-capita and per-MMR-point spending only
+    count the spending of country-years that have a population or MMR value.
+    """
+    by = list(by)
+    rows = df.reset_index()
+    for column in RATIO_DENOMINATORS:
+        covered = rows["Total Spending"].where(rows[column].notna(), 0)
+        rows[f"_spending_with_{column}"] = covered
+    covered_columns = [f"_spending_with_{c}" for c in RATIO_DENOMINATORS]
+    sums = rows.groupby(by, observed=True)[MONEY_COLUMNS + covered_columns].sum()
+    country_years = rows.drop_duplicates(by + ["Country", "Year"])
+    dims = country_years.groupby(by, observed=True).agg(
+        Population=("Population", "sum"),
+        MMR=("MMR", "mean"),
+        Countries=("Country", "nunique"),
+    )
+    df = derive(sums.join(dims))
+    for column, ratio in RATIO_DENOMINATORS.items():
+        df[ratio] = df.pop(f"_spending_with_{column}") / df[column]
+    return df
+
+
+def _input_digests(names) -> dict:
+    manifest = dataCatalog._load_manifest()
+    return {name: manifest.get(name, {}).get("sha256") for name in names}
+
+
+def _inputs(mmr_source) -> list:
+    return ["fundings", "outcomes", "population", mmr_source]
+
+
+def rollup_path(name: str) -> str:
+    return os.path.join(CUBE_DIR, f"rollup_{name}.parquet")
+
+
+def is_fresh() -> bool:
+    if not os.path.exists(MANIFEST_PATH) or not os.path.exists(CUBE_PATH):
+        return False
+    with open(MANIFEST_PATH, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != CUBE_VERSION:
+        return False
+    names = _inputs(manifest["mmr_source"])
+    for name in names:
+        dataCatalog.build(name)
+    return manifest["inputs"] == _input_digests(names)
+
+
+def build(force: bool = False) -> bool:
+    """Write the cube and its rollups; returns True if they were rebuilt."""
+    if not force and is_fresh():
+        return False
+    cube = build_cube()
+    os.makedirs(CUBE_DIR, exist_ok=True)
+    cube.to_parquet(f"{CUBE_PATH}.tmp")
+    os.replace(f"{CUBE_PATH}.tmp", CUBE_PATH)
+    for name, by in ROLLUPS.items():
+        aggregate_frame(cube, by).to_parquet(rollup_path(name))
+    mmr_source = cube.attrs["mmr_source"]
+    manifest = {
+        "version": CUBE_VERSION,
+        "mmr_source": mmr_source,
+        "inputs": _input_digests(_inputs(mmr_source)),
+        "rows": len(cube),
+    }
+    with open(f"{MANIFEST_PATH}.tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(f"{MANIFEST_PATH}.tmp", MANIFEST_PATH)
+    load_cube.cache_clear()
+    rollup.cache_clear()
+    return True
+
+
+# === Query API ===
+@lru_cache(maxsize=1)
+def load_cube() -> pd.DataFrame:
+    build()
+    return pd.read_parquet(CUBE_PATH)
+
+
+@lru_cache(maxsize=None)
+def rollup(name: str) -> pd.DataFrame:
+    """A precomputed rollup from ROLLUPS."""
+    if name not in ROLLUPS:
+        raise KeyError(f"Unknown rollup {name!r}; choose from {sorted(ROLLUPS)}")
+    load_cube()
+    return pd.read_parquet(rollup_path(name))
+
+
+def _as_list(values):
+    if values is None or isinstance(values, (list, tuple, set, range)):
+        return values
+    return [values]
+
+
+def query(
+    countries=None, years=None, programs=None, continents=None, columns=None
+) -> pd.DataFrame:
+    """
+    Cube rows matching every given filter. Countries accept any spelling;
+    years may be a range.
+    """
+    df = load_cube()
+    if countries is not None:
+        slugs = to_slug(pd.Series(_as_list(countries))).dropna().tolist()
+        df = df[df.index.get_level_values("Country").isin(slugs)]
+    if years is not None:
+        df = df[df.index.get_level_values("Year").isin(list(_as_list(years)))]
+    if programs is not None:
+        df = df[df.index.get_level_values("Program").isin(_as_list(programs))]
+    if continents is not None:
+        df = df[df.Continent.isin(_as_list(continents))]
+    return df if columns is None else df[columns]
+
+
+def aggregate(by=("Continent",), **filters) -> pd.DataFrame:
+    """Totals and derived metrics by `by`; unfiltered requests come from the rollups."""
+    by = list(_as_list(by))
+    if not any(value is not None for value in filters.values()):
+        for name, columns in ROLLUPS.items():
+            if columns == by:
+                return rollup(name)
+    return aggregate_frame(query(**filters), by)
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    rebuilt = build(force="--force" in sys.argv)
+    cube = load_cube()
+    print(
+        f"Cube: {len(cube)} rows, {'rebuilt' if rebuilt else 'fresh'} "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+    with pd.option_context("display.width", 200, "display.max_columns", 20):
+        print(aggregate(["Continent", "Year"]).round(3))
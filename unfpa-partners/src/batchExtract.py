@@ -0,0 +1,229 @@
+import base64
+import json
+import os
+import sys
+
+import pandas as pd
+import requests
+
+from llmCache import get_cache, make_key
+from readDataImage import (
+    PREPROCESS_IMAGES,
+    TableData,
+    build_vision_prompt,
+    collectResults,
+    get_default_prompt,
+    get_openai_client,
+    load_image_bytes,
+)
+
+PAGES_DIR = "../data/unfpa_partners"
+JOB_PATH = "../data/interim/unfpa_partners_batch.jsonl"
+RESULT_PATH = "../data/interim/unfpa_partners_batch_results.jsonl"
+ENDPOINT = "/v1/chat/completions"
+
+
+def strict_json_schema(model) -> dict:
+    """Pydantic JSON schema tightened to what structured outputs' strict mode accepts."""
+    schema = model.model_json_schema()
+
+    def tighten(node):
+        if isinstance(node, dict):
+            if node.get("type") == "object":
+                node["additionalProperties"] = False
+                node["required"] = list(node.get("properties", {}))
+            for value in node.values():
+                tighten(value)
+        elif isinstance(node, list):
+            for value in node:
+                tighten(value)
+
+    tighten(schema)
+    return schema
+
+
+def build_batch_request(
+    i: int, model_name="gpt-4o", preprocess=PREPROCESS_IMAGES
+) -> dict:
+    image_bytes = load_image_bytes(os.path.join(PAGES_DIR, f"p{i}.png"), preprocess)
+    messages = build_vision_prompt(
+        get_default_prompt(), base64.b64encode(image_bytes).decode("utf-8")
+    )
+    return {
+        "custom_id": f"p{i}",
+        "method": "POST",
+        "url": ENDPOINT,
+        "body": {
+            "model": model_name,
+            "messages": messages,
+            "temperature": 0,
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "TableData",
+                    "schema": strict_json_schema(TableData),
+                    "strict": True,
+                },
+            },
+        },
+    }
+
+
+def write_batch_job(
+    pages=range(1, 46),
+    job_path=JOB_PATH,
+    model_name="gpt-4o",
+    preprocess=PREPROCESS_IMAGES,
+):
+    os.makedirs(os.path.dirname(job_path), exist_ok=True)
+    with open(job_path, "w", encoding="utf-8") as f:
+        for i in pages:
+            request = build_batch_request(i, model_name, preprocess)
+            f.write(json.dumps(request) + "\n")
+    print(f"Wrote {len(pages)} page requests to {job_path}")
+    return job_path
+
+
+def submit_batch(job_path=JOB_PATH) -> str:
+    client = get_openai_client()
+    with open(job_path, "rb") as f:
+        batch_file = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=batch_file.id, endpoint=ENDPOINT, completion_window="24h"
+    )
+    print(f"Submitted batch {batch.id}")
+    return batch.id
+
+
+def download_batch_results(batch_id: str, result_path=RESULT_PATH):
+    """
+    Write the output and error files of a completed batch into one result
+    file; requests that failed inside the batch only appear in the error file.
+    """
+    client = get_openai_client()
+    batch = client.batches.retrieve(batch_id)
+    print(f"Batch {batch_id}: {batch.status} {batch.request_counts}")
+    if batch.status != "completed":
+        return None
+    file_ids = [batch.output_file_id, batch.error_file_id]
+    file_ids = [file_id for file_id in file_ids if file_id]
+    if not file_ids:
+        print(f"Batch {batch_id} has neither an output nor an error file")
+        return None
+    with open(result_path, "w", encoding="utf-8") as f:
+        for file_id in file_ids:
+            text = client.files.content(file_id).text
+            f.write(text if text.endswith("\n") or not text else text + "\n")
+    return result_path
+
+
+def run_batch_locally(job_path=JOB_PATH, result_path=RESULT_PATH, base_url=None):
+    """
+    Produce a batch result file by replaying each job line against an
+    OpenAI-compatible endpoint (e.g. stubServer) instead of the Batch API.
+    """
+    base_url = base_url or os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+    headers = {"Authorization": f"Bearer {os.getenv('OPENAI_API_KEY', '')}"}
+    with open(job_path, encoding="utf-8") as job, open(
+        result_path, "w", encoding="utf-8"
+    ) as out:
+        for line in job:
+            request = json.loads(line)
+            url = base_url.rstrip("/") + request["url"].removeprefix("/v1")
+            response = requests.post(url, json=request["body"], headers=headers)
+            out.write(
+                json.dumps(
+                    {
+                        "id": f"batch_req_{request['custom_id']}",
+                        "custom_id": request["custom_id"],
+                        "response": {
+                            "status_code": response.status_code,
+                            "body": response.json(),
+                        },
+                        "error": None,
+                    }
+                )
+                + "\n"
+            )
+    return result_path
+
+
+def job_pages(job_path=JOB_PATH) -> list:
+    with open(job_path, encoding="utf-8") as f:
+        return [json.loads(line)["custom_id"] for line in f if line.strip()]
+
+
+def ingest_batch_results(
+    result_path=RESULT_PATH,
+    model_name="gpt-4o",
+    preprocess=PREPROCESS_IMAGES,
+    job_path=JOB_PATH,
+):
+    """
+    Fan a batch result file out into p{i}.csv. unfpa_partners.csv is rebuilt
+    only when every page of the job succeeded, so stale pages from an earlier
+    run are never merged in.
+    """
+    prompt = get_default_prompt()
+    failed = []
+    seen = set()
+    with open(result_path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            page = result["custom_id"]
+            seen.add(page)
+            response = result.get("response") or {}
+            if result.get("error") or response.get("status_code") != 200:
+                error = result.get("error") or (response.get("body") or {}).get("error")
+                print(f"Error in batch result for {page}: {error}")
+                failed.append(page)
+                continue
+            try:
+                content = response["body"]["choices"][0]["message"]["content"]
+                table = TableData.model_validate_json(content)
+            except Exception as e:
+                print(f"Error parsing batch result for {page}. Exception: {e}")
+                failed.append(page)
+                continue
+
+            df = pd.DataFrame([row.model_dump() for row in table.rows])
+            df.to_csv(os.path.join(PAGES_DIR, f"{page}.csv"), index=False)
+
+            # Warm the extraction cache so a later readDataImage.main is free
+            image_path = os.path.join(PAGES_DIR, f"{page}.png")
+            image_bytes = load_image_bytes(image_path, preprocess)
+            key = make_key(image_bytes, prompt, model_name, TableData)
+            get_cache().put(key, table.model_dump_json(), model_name)
+
+    if os.path.exists(job_path):
+        missing = [page for page in job_pages(job_path) if page not in seen]
+        if missing:
+            print(f"No batch result for: {', '.join(missing)}")
+        failed.extend(missing)
+
+    if failed:
+        print(f"{len(failed)} pages failed: {', '.join(failed)}")
+        print("unfpa_partners.csv not rebuilt; re-extract the failed pages first")
+    else:
+        collectResults()
+    return failed
+
+
+if __name__ == "__main__":
+    # python batchExtract.py write | submit | fetch <batch_id> | local | ingest
+    command = sys.argv[1] if len(sys.argv) > 1 else "write"
+    if command == "write":
+        write_batch_job()
+    elif command == "submit":
+        submit_batch(write_batch_job())
+    elif command == "fetch":
+        if download_batch_results(sys.argv[2]):
+            ingest_batch_results()
+    elif command == "local":
+        run_batch_locally()
+    elif command == "ingest":
+        ingest_batch_results()
+    else:
+        print(f"Unknown command: {command}")
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+import pandas as pd
+import requests
+
+import getOrgInfos
+import test as ecfr
+from httpClient import AsyncHTTPClient, HTTPCache, HTTPClient
+from stubServer import site
+
+QUERIES = 40
+SECTIONS = 20
+LATENCY = 0.02
+
+
+def search_routes() -> dict:
+    """SerpAPI stand-in; like the real API it sends no ETag/Last-Modified."""
+    search = {
+        "organic_results": [
+            {"title": f"Result {i}", "snippet": "Address: 1 Main St", "link": "x"}
+            for i in range(5)
+        ]
+    }
+    return {"/search": ("application/json", json.dumps(search), LATENCY)}
+
+
+def ecfr_routes() -> dict:
+    """eCFR API stand-in for Title 21, Part 1, Subpart B."""
+    sections = [{"label": f"§ 1.{i}", "identifier": f"1.{i}"} for i in range(SECTIONS)]
+    structure = {
+        "children": [
+            {
+                "label": "Part 1 - General Enforcement Regulations",
+                "children": [{"label": "Subpart B - General", "children": sections}],
+            }
+        ]
+    }
+    routes = {
+        "/api/current/title-21": ("application/json", json.dumps(structure), LATENCY),
+    }
+    for section in sections:
+        body = json.dumps({"text": f"Text of {section['label']} " * 50})
+        path = f"/api/reader/v1/section/{section['identifier']}"
+        routes[path] = ("application/json", body, LATENCY)
+    return routes
+
+
+class BareClient:
+    """The old call pattern: a fresh requests.get per call, no timeout, no cache."""
+
+    requests = 0
+
+    def get(self, url, params=None, headers=None, ttl=None):
+        self.requests += 1
+        return requests.get(url, params=params, headers=headers)
+
+
+def run_serpapi(client) -> float:
+    getOrgInfos.get_client = lambda: client
+    start = time.perf_counter()
+    for i in range(QUERIES):
+        getOrgInfos.search_ngos_serpapi(f"NGO {i}")
+    return time.perf_counter() - start
+
+
+def run_ecfr(client, base_url) -> float:
+    start = time.perf_counter()
+    ecfr.fetch_subpart_b(client, base_url)
+    return time.perf_counter() - start
+
+
+async def run_serpapi_async(client) -> float:
+    params = [{"q": f"NGO {i}", "num": 5} for i in range(QUERIES)]
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(client.get(getOrgInfos.SERPAPI_URL, params=p) for p in params)
+    )
+    return time.perf_counter() - start
+
+
+def benchmark():
+    rows = []
+    with site(search_routes(), etag=False) as search_url, site(
+        ecfr_routes()
+    ) as base_url, tempfile.TemporaryDirectory() as tmp:
+        getOrgInfos.SERPAPI_URL = f"{search_url}/search"
+        cache = HTTPCache(os.path.join(tmp, "http_cache.db"))
+        configs = [
+            ("bare requests.get", BareClient()),
+            ("pooled, no cache", HTTPClient()),
+            ("pooled, cold cache", HTTPClient(cache=cache)),
+            ("pooled, warm cache", HTTPClient(cache=cache)),
+        ]
+        for name, client in configs:
+            before = dict(cache.stats)
+            serpapi_s = run_serpapi(client)
+            ecfr_s = run_ecfr(client, base_url)
+            rows.append(
+                {
+                    "client": name,
+                    "serpapi_s": round(serpapi_s, 3),
+                    "ecfr_s": round(ecfr_s, 3),
+                    "requests": client.requests,
+                    "revalidated": cache.stats["revalidated"] - before["revalidated"],
+                }
+            )
+
+        async def run_async():
+            client = AsyncHTTPClient()
+            try:
+                return await run_serpapi_async(client), client.requests
+            finally:
+                await client.close()
+
+        serpapi_s, sent = asyncio.run(run_async())
+        rows.append(
+            {
+                "client": "async, concurrent",
+                "serpapi_s": round(serpapi_s, 3),
+                "ecfr_s": None,
+                "requests": sent,
+                "revalidated": 0,
+            }
+        )
+
+    df = pd.DataFrame(rows)
+    print(df.to_string(index=False))
+    return df
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,114 @@
+import asyncio
+import json
+import statistics
+
+import pandas as pd
+
+from browserPool import BLOCKED_URL_PATTERNS
+from getOrgData import WebScraperAgent
+from stubServer import site
+
+PAGE_LOADS = 5
+COURSES = 24
+IMAGE_DELAY = 0.15
+FONT_DELAY = 0.3
+ANALYTICS_DELAY = 0.8
+RENDER_DELAY_MS = 300
+
+# The local analytics script stands in for third-party trackers
+BENCH_BLOCK_PATTERNS = BLOCKED_URL_PATTERNS + ["*/analytics/*"]
+
+
+def course_cards(n=COURSES) -> str:
+    return "\n".join(
+        f'<div class="course-card"><img src="/img/{i}.png">'
+        f"<h2>Course {i}</h2><p>Description of course {i}</p>"
+        f'<a href="/courses/{i}">Enroll</a></div>'
+        for i in range(n)
+    )
+
+
+def fixture_routes() -> dict:
+    """A static listing and a JS-rendered listing that share heavy assets."""
+    head = """
+        <link rel="preload" href="/font.woff2" as="font" crossorigin>
+        <style>@font-face { font-family: f; src: url(/font.woff2); }
+        body { font-family: f; }</style>
+        <script async src="/analytics/tag.js"></script>
+    """
+    static_page = f"<html><head>{head}</head><body>{course_cards()}</body></html>"
+    dynamic_page = f"""<html><head>{head}</head><body><div id="app"></div>
+        <script src="/app.js"></script></body></html>"""
+    app_js = f"""
+        setTimeout(() => {{
+            document.getElementById("app").innerHTML = {json.dumps(course_cards())};
+        }}, {RENDER_DELAY_MS});
+    """
+    routes = {
+        "/static": ("text/html", static_page, 0.0),
+        "/dynamic": ("text/html", dynamic_page, 0.0),
+        "/app.js": ("application/javascript", app_js, 0.05),
+        "/font.woff2": ("font/woff2", b"\0" * 20000, FONT_DELAY),
+        "/analytics/tag.js": ("application/javascript", "//", ANALYTICS_DELAY),
+    }
+    for i in range(COURSES):
+        routes[f"/img/{i}.png"] = ("image/png", b"\0" * 5000, IMAGE_DELAY)
+    return routes
+
+
+CONFIGS = [
+    ("fixed", False),
+    ("fixed", True),
+    ("networkidle", False),
+    ("networkidle", True),
+    ("selector", False),
+    ("selector", True),
+    ("dom-stable", False),
+    ("dom-stable", True),
+]
+
+
+async def run_config(base_url, path, readiness, block, loads=PAGE_LOADS):
+    agent = WebScraperAgent(
+        readiness=readiness,
+        selector=".course-card",
+        block=block,
+        block_patterns=BENCH_BLOCK_PATTERNS,
+    )
+    complete = 0
+    try:
+        for _ in range(loads):
+            html = await agent.scrape_content(f"{base_url}{path}")
+            complete += html.count('class="course-card"') == COURSES
+    finally:
+        await agent.close()
+    totals = [t["total_ms"] for t in agent.timings]
+    return {
+        "page": path,
+        "readiness": readiness,
+        "block": block,
+        "median_ms": statistics.median(totals),
+        "goto_ms": statistics.median(t["goto_ms"] for t in agent.timings),
+        "ready_ms": statistics.median(t["ready_ms"] for t in agent.timings),
+        "blocked_requests": agent.block_stats.blocked,
+        "complete": f"{complete}/{loads}",
+    }
+
+
+async def benchmark():
+    rows = []
+    with site(fixture_routes()) as base_url:
+        for path in ("/static", "/dynamic"):
+            for readiness, block in CONFIGS:
+                rows.append(await run_config(base_url, path, readiness, block))
+                print(rows[-1])
+
+    df = pd.DataFrame(rows)
+    baseline = df[(df.readiness == "fixed") & ~df.block].set_index("page").median_ms
+    df["saved_ms"] = df.page.map(baseline) - df.median_ms
+    print(df.to_string(index=False))
+    return df
+
+
+if __name__ == "__main__":
+    asyncio.run(benchmark())
@@ -0,0 +1,202 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+
+# Benchmarks measure the pipelines, not the caches in front of them
+os.environ.setdefault("LLM_CACHE_MODE", "bypass")
+os.environ.setdefault("HTTP_CACHE_MODE", "bypass")
+os.environ.setdefault("LLM_METER_PATH", "")
+
+import pandas as pd
+
+from llmMeter import get_meter, percentile
+from stubServer import FIXTURE_DIR, record, replay
+
+RESULTS_PATH = "../data/interim/benchmarks.csv"
+ITEMS = 10
+
+# Live services that fixtures are recorded from
+UPSTREAMS = {
+    "openai": "https://api.openai.com",
+    "serpapi": "https://serpapi.com",
+    "site": "https://www.deeplearning.ai",
+}
+
+
+# === Fixtures ===
+def fixture_path(workload, name) -> str:
+    return os.path.join(FIXTURE_DIR, workload, f"{name}.jsonl")
+
+
+def missing_fixtures(workload, names) -> list:
+    return [
+        p for p in (fixture_path(workload, n) for n in names) if not os.path.exists(p)
+    ]
+
+
+@contextmanager
+def upstreams(workload, names, mode="replay", latency=None):
+    """
+    Base URL per upstream: recording proxies to the live services, or replay
+    servers answering from data/fixtures/{workload}/{name}.jsonl.
+    """
+    with ExitStack() as stack:
+        urls = {}
+        for name in names:
+            path = fixture_path(workload, name)
+            if mode == "record":
+                urls[name] = stack.enter_context(record(UPSTREAMS[name], path))
+            else:
+                urls[name] = stack.enter_context(replay(path, latency))
+        yield urls
+
+
+def point_at(urls):
+    """Route the pipelines' clients to local URLs. Run before importing them."""
+    if "openai" in urls:
+        os.environ["OPENAI_BASE_URL"] = f"{urls['openai']}/v1"
+        os.environ.setdefault("OPENAI_API_KEY", "replay")
+    if "serpapi" in urls:
+        os.environ["SERPAPI_URL"] = f"{urls['serpapi']}/search"
+
+
+# === Workloads ===
+# Each returns (number of items, callable running them once)
+def read_data_image(urls, items):
+    import readDataImage
+
+    out_dir = tempfile.mkdtemp()
+    pages = range(1, items + 1)
+    return items, lambda: readDataImage.main(pages=pages, out_dir=out_dir)
+
+
+def get_org_infos(urls, items, batched):
+    import getOrgInfos
+
+    getOrgInfos.SERPAPI_URL = os.environ["SERPAPI_URL"]
+    names = list(dict.fromkeys(getOrgInfos.get_org_names()))[:items]
+
+    def run():
+        getOrgInfos.lookup_orgs(names, lambda *result: None, batched=batched)
+
+    return len(names), run
+
+
+def get_org_infos_online(urls, items):
+    import getOrgInfosOnline
+
+    df = getOrgInfosOnline.get_org_data()
+    df = df[df.OrgType == "NGO"]
+    names = list(dict.fromkeys(df.OrgName + ", " + df.Country))[:items]
+    return len(names), lambda: asyncio.run(getOrgInfosOnline.enrich_ngos(names))
+
+
+def get_org_data(urls, items):
+    import getOrgData
+
+    target_url = f"{urls['site']}/courses"
+
+    def run():
+        getOrgData.scraper = getOrgData.WebScraperAgent()
+        asyncio.run(getOrgData.webscraper(target_url, getOrgData.instructions))
+
+    return 1, run
+
+
+# name: (upstreams, workload)
+WORKLOADS = {
+    "readDataImage": (["openai"], read_data_image),
+    "getOrgInfos": (
+        ["openai", "serpapi"],
+        lambda urls, items: get_org_infos(urls, items, batched=False),
+    ),
+    "getOrgInfos-batched": (
+        ["openai", "serpapi"],
+        lambda urls, items: get_org_infos(urls, items, batched=True),
+    ),
+    "getOrgInfosOnline": (["openai"], get_org_infos_online),
+    "getOrgData": (["openai", "site"], get_org_data),
+}
+
+
+def measure(name, items, run) -> dict:
+    """Wall time, throughput, model-call latency percentiles and peak Python memory."""
+    meter = get_meter()
+    before = len(meter.records)
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        run()
+    finally:
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    calls = meter.records[before:]
+    latencies = [r["latency"] for r in calls]
+    return {
+        "workload": name,
+        "items": items,
+        "seconds": round(seconds, 3),
+        "items_per_s": round(items / seconds, 2) if seconds else None,
+        "model_calls": len(calls),
+        "call_errors": sum(r["error"] is not None for r in calls),
+        "call_p50_s": percentile(latencies, 0.5),
+        "call_p95_s": percentile(latencies, 0.95),
+        "peak_mb": round(peak / 2**20, 1),
+    }
+
+
+def benchmark(names=None, mode="replay", latency=None, items=ITEMS, repeat=1):
+    rows = []
+    for name in names or WORKLOADS:
+        upstream_names, workload = WORKLOADS[name]
+        missing = missing_fixtures(name, upstream_names)
+        if mode == "replay" and missing:
+            paths = ", ".join(os.path.relpath(p) for p in missing)
+            print(f"{name}: no fixtures ({paths}), run with --record")
+            continue
+        with upstreams(name, upstream_names, mode, latency) as urls:
+            point_at(urls)
+            count, run = workload(urls, items)
+            for _ in range(1 if mode == "record" else repeat):
+                try:
+                    rows.append(measure(name, count, run))
+                except Exception as e:
+                    print(f"{name} failed: {e}")
+    df = pd.DataFrame(rows)
+    if not df.empty:
+        df.insert(0, "run_at", datetime.now(timezone.utc).isoformat(timespec="seconds"))
+        df.insert(1, "mode", mode)
+        print(df.drop(columns=["run_at"]).to_string(index=False))
+        if mode == "replay":
+            # Appended, so successive runs on the same fixtures can be compared
+            header = not os.path.exists(RESULTS_PATH)
+            df.to_csv(RESULTS_PATH, mode="a", header=header, index=False)
+    return df
+
+
+if __name__ == "__main__":
+    # benchmarks.py [workload ...] [--record] [--latency S] [--items N] [--repeat R]
+    args = sys.argv[1:]
+
+    def option(flag, cast, default):
+        return cast(args[args.index(flag) + 1]) if flag in args else default
+
+    values = {
+        args[i + 1]
+        for i, a in enumerate(args)
+        if a in ("--latency", "--items", "--repeat")
+    }
+    names = [a for a in args if not a.startswith("--") and a not in values]
+    benchmark(
+        names or None,
+        mode="record" if "--record" in args else "replay",
+        latency=option("--latency", float, None),
+        items=option("--items", int, ITEMS),
+        repeat=option("--repeat", int, 1),
+    )
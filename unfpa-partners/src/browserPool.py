@@ -0,0 +1,282 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from fnmatch import fnmatch
+from typing import Awaitable, Callable, Optional
+
+from playwright.async_api import Browser, BrowserContext, Page, async_playwright
+
+CHROMIUM_ARGS = [
+    "--disable-dev-shm-usage",
+    "--no-sandbox",
+    "--disable-setuid-sandbox",
+    "--disable-accelerated-2d-canvas",
+    "--disable-gpu",
+    "--no-zygote",
+    "--disable-audio-output",
+    "--disable-software-rasterizer",
+    "--disable-webgl",
+    "--disable-web-security",
+    "--disable-features=LazyFrameLoading",
+    "--disable-features=IsolateOrigins",
+    "--disable-background-networking",
+]
+
+POOL_SIZE = 4
+MAX_NAVIGATIONS = 50  # recycle a context after this many page loads
+
+# Readiness: "fixed" (load + 2 s sleep), "networkidle", "selector" or "dom-stable".
+# Stays on the old behaviour until benchScraper.py numbers justify a faster default.
+READINESS = "fixed"
+FIXED_WAIT_MS = 2000
+# Abort images, fonts, media and trackers; opt-in for the same reason, and because
+# screenshots of blocked pages lose their images and fonts
+BLOCK_REQUESTS = False
+DOM_QUIET_MS = 500  # DOM counts as stable after this long without mutations
+READY_TIMEOUT_MS = 10000
+
+# Requests we never need for text extraction
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+BLOCKED_URL_PATTERNS = [
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*connect.facebook.net*",
+    "*hotjar.com*",
+    "*segment.io*",
+    "*hs-scripts.com*",
+    "*hs-analytics.net*",
+    "*clarity.ms*",
+]
+
+DOM_STABLE_JS = """
+([quietMs, timeoutMs]) => new Promise((resolve) => {
+    let timer;
+    const observer = new MutationObserver(() => {
+        clearTimeout(timer);
+        timer = setTimeout(done, quietMs);
+    });
+    function done() {
+        observer.disconnect();
+        resolve(true);
+    }
+    observer.observe(document, {
+        childList: true, subtree: true, attributes: true, characterData: true,
+    });
+    timer = setTimeout(done, quietMs);
+    setTimeout(() => { observer.disconnect(); resolve(false); }, timeoutMs);
+})
+"""
+
+
+# === Request blocking ===
+class BlockStats:
+    def __init__(self):
+        self.blocked = 0
+        self.allowed = 0
+
+
+async def block_resources(
+    target,
+    resource_types=BLOCKED_RESOURCE_TYPES,
+    url_patterns=BLOCKED_URL_PATTERNS,
+    stats: Optional[BlockStats] = None,
+):
+    """Abort unneeded requests on a page or a whole browser context."""
+
+    async def handler(route):
+        request = route.request
+        if request.resource_type in resource_types or any(
+            fnmatch(request.url, pattern) for pattern in url_patterns
+        ):
+            if stats:
+                stats.blocked += 1
+            await route.abort()
+        else:
+            if stats:
+                stats.allowed += 1
+            await route.continue_()
+
+    await target.route("**/*", handler)
+
+
+# === Readiness ===
+async def wait_until_ready(
+    page: Page,
+    strategy: str = READINESS,
+    selector: Optional[str] = None,
+    timeout_ms: int = READY_TIMEOUT_MS,
+):
+    if strategy == "fixed":
+        await page.wait_for_load_state("load", timeout=timeout_ms)
+        await page.wait_for_timeout(FIXED_WAIT_MS)  # Wait for dynamic content
+    elif strategy == "networkidle":
+        await page.wait_for_load_state("networkidle", timeout=timeout_ms)
+    elif strategy == "selector":
+        if not selector:
+            raise ValueError("The selector readiness strategy needs a selector")
+        await page.wait_for_selector(selector, state="attached", timeout=timeout_ms)
+    elif strategy == "dom-stable":
+        await page.evaluate(DOM_STABLE_JS, [DOM_QUIET_MS, timeout_ms])
+    else:
+        raise ValueError(f"Unknown readiness strategy: {strategy}")
+
+
+async def load_page(
+    page: Page,
+    url: str,
+    strategy: str = READINESS,
+    selector: Optional[str] = None,
+    timeout_ms: int = READY_TIMEOUT_MS,
+) -> tuple:
+    """Navigate, wait for readiness and return (html, timing dict)."""
+    start = time.perf_counter()
+    wait_until = "load" if strategy == "fixed" else "domcontentloaded"
+    await page.goto(url, wait_until=wait_until, timeout=timeout_ms)
+    navigated = time.perf_counter()
+    await wait_until_ready(page, strategy, selector, timeout_ms)
+    ready = time.perf_counter()
+    html = await page.content()
+    timing = {
+        "url": url,
+        "strategy": strategy,
+        "goto_ms": round((navigated - start) * 1000),
+        "ready_ms": round((ready - navigated) * 1000),
+        "total_ms": round((time.perf_counter() - start) * 1000),
+    }
+    return html, timing
+
+
+@dataclass
+class PoolSlot:
+    context: BrowserContext
+    page: Page
+    navigations: int = 0
+    crashed: bool = False
+
+
+class BrowserPool:
+    """
+    One long-lived Chromium shared by `size` isolated contexts, each with a
+    single page. Callers borrow a slot with `acquire()`/`release()` (or the
+    `slot()` context manager); a context is recycled after `max_navigations`
+    uses or as soon as its page crashes or raises.
+    """
+
+    def __init__(
+        self,
+        size: int = POOL_SIZE,
+        max_navigations: int = MAX_NAVIGATIONS,
+        headless: bool = True,
+        context_options: Optional[dict] = None,
+        on_context: Optional[Callable[[BrowserContext], Awaitable[None]]] = None,
+    ):
+        self.size = size
+        self.max_navigations = max_navigations
+        self.headless = headless
+        self.context_options = context_options or {}
+        self.on_context = on_context
+        self.playwright = None
+        self.browser: Optional[Browser] = None
+        self.recycled = 0
+        # Idle slots; None marks a slot whose recycle failed and must be rebuilt
+        self._idle = asyncio.Queue()
+        self._start_lock = asyncio.Lock()
+
+    async def start(self):
+        """Launch the browser and fill the pool; safe to call concurrently."""
+        async with self._start_lock:
+            if self.browser is not None:
+                return self
+            self.playwright = await async_playwright().start()
+            self.browser = await self._launch()
+            slots = await asyncio.gather(*(self._new_slot() for _ in range(self.size)))
+            for slot in slots:
+                self._idle.put_nowait(slot)
+        return self
+
+    async def _launch(self) -> Browser:
+        return await self.playwright.chromium.launch(
+            headless=self.headless, args=CHROMIUM_ARGS
+        )
+
+    async def _relaunch_if_closed(self):
+        async with self._start_lock:
+            if not self.browser.is_connected():
+                self.browser = await self._launch()
+
+    async def _new_slot(self) -> PoolSlot:
+        context = await self.browser.new_context(**self.context_options)
+        if self.on_context:
+            await self.on_context(context)
+        page = await context.new_page()
+        slot = PoolSlot(context=context, page=page)
+        page.on("crash", lambda _: setattr(slot, "crashed", True))
+        return slot
+
+    async def acquire(self) -> PoolSlot:
+        if self.browser is None:
+            await self.start()
+        slot = await self._idle.get()
+        if slot is None:
+            try:
+                await self._relaunch_if_closed()
+                slot = await self._new_slot()
+            except Exception:
+                self._idle.put_nowait(None)
+                raise
+        return slot
+
+    async def release(self, slot: PoolSlot, failed: bool = False):
+        slot.navigations += 1
+        worn_out = slot.navigations >= self.max_navigations
+        if failed or worn_out or slot.crashed or slot.page.is_closed():
+            self.recycled += 1
+            try:
+                await slot.context.close()
+            except Exception:
+                pass
+            try:
+                slot = await self._new_slot()
+            except Exception:
+                # Browser crashed or closed; keep the slot count, rebuild on acquire
+                slot = None
+        self._idle.put_nowait(slot)
+
+    @asynccontextmanager
+    async def slot(self):
+        slot = await self.acquire()
+        failed = False
+        try:
+            yield slot
+        except Exception:
+            failed = True
+            raise
+        finally:
+            await self.release(slot, failed=failed)
+
+    async def map(self, fn: Callable[[Page, str], Awaitable], urls: list) -> list:
+        """Run `fn(page, url)` for every URL across the pool, in input order."""
+
+        async def run(url):
+            async with self.slot() as slot:
+                return await fn(slot.page, url)
+
+        return await asyncio.gather(*(run(url) for url in urls), return_exceptions=True)
+
+    async def close(self):
+        while not self._idle.empty():
+            slot = self._idle.get_nowait()
+            if slot is None:
+                continue
+            try:
+                await slot.context.close()
+            except Exception:
+                pass
+        if self.browser:
+            await self.browser.close()
+        if self.playwright:
+            await self.playwright.stop()
+        self.browser = None
+        self.playwright = None
@@ -0,0 +1,246 @@
+import os
+import re
+import unicodedata
+from functools import lru_cache
+
+import pandas as pd
+
+from dataCatalog import DATA_DIR
+
+try:
+    import pycountry
+except ImportError:  # ISO columns stay empty without it
+    pycountry = None
+
+COUNTRIES_PATH = os.path.join(DATA_DIR, "unfpa_countries.csv")
+
+# Standardized names from the notebook's get_continent
+SPECIAL_CASES = {
+    "Côte d'Ivoire": "Ivory Coast",
+    "Democratic People's Republic of Korea": "North Korea",
+    "Republic of Korea": "South Korea",
+    "Russian Federation": "Russia",
+    "Syrian Arab Republic": "Syria",
+    "United Kingdom of Great Britain and Northern Ireland": "United Kingdom",
+    "United Republic of Tanzania": "Tanzania",
+    "United States of America": "United States",
+    "Viet Nam": "Vietnam",
+    "Iran (Islamic Republic of)": "Iran",
+    "Bolivia (Plurinational State of)": "Bolivia",
+    "Micronesia (Federated States of)": "Micronesia",
+    "Lao People's Democratic Republic": "Laos",
+    "Moldova, Republic of": "Moldova",
+    "Palestine, State of": "Palestine",
+    "Taiwan, Province of China": "Taiwan",
+    "Venezuela (Bolivarian Republic of)": "Venezuela",
+    "China, Hong Kong Special Administrative Region": "Hong Kong",
+    "China, Macao Special Administrative Region": "Macao",
+    "Sint Maarten (Dutch part)": "Sint Maarten",
+    "Czechia": "Czech Republic",
+    "Swaziland": "Eswatini",
+    "Myanmar": "Burma",
+    "Cabo Verde": "Cape Verde",
+    "Timor-Leste": "East Timor",
+    "Türkiye": "Turkey",
+    "Kosovo": "Kosovo",
+}
+
+# Spellings used by UNFPA partner lists, WHO GHO and UNICEF sheets
+EXTRA_ALIASES = {
+    "State of Palestine1": [
+        "State of Palestine",
+        "Palestine",
+        "Palestine, State of",
+        "occupied Palestinian territory, including east Jerusalem",
+    ],
+    "Republic of Moldova": ["Moldova", "Moldova Republic", "Moldova, Republic of"],
+    "Yemen": ["Republic of Yemen"],
+    "Lao People's Democratic Republic": ["Lao", "Lao PDR"],
+    "North Macedonia": ["Macedonia", "The former Yugoslav Republic of Macedonia"],
+    "Netherlands": ["Netherlands (Kingdom of the)"],
+    "Democratic Republic of the Congo": [
+        "DR Congo",
+        "DRC",
+        "Congo, Democratic Republic of the",
+        "Congo (Democratic Republic of the)",
+    ],
+    "Congo": ["Republic of the Congo", "Congo, Republic of the"],
+    "Gambia": ["The Gambia", "Gambia, The"],
+    "Bahamas": ["The Bahamas", "Bahamas, The"],
+    "Democratic People's Republic of Korea": ["Korea, Democratic People's Republic of"],
+    "Republic of Korea": ["Korea, Republic of"],
+    "United Kingdom of Great Britain and Northern Ireland": ["UK"],
+    "United States of America": ["USA", "US"],
+    "Curaçao": ["Curacao"],
+    "Réunion": ["Reunion"],
+}
+
+# pycountry can't resolve these display names on its own
+ISO2_OVERRIDES = {
+    "State of Palestine1": "PS",
+    "Democratic Republic of the Congo": "CD",
+    "Republic of Korea": "KR",
+    "United States Virgin Islands": "VI",
+    "Micronesia (Federated States of)": "FM",
+}
+# User-assigned codes that aren't in ISO 3166 (alpha_2, alpha_3, M49)
+NON_ISO_CODES = {"Kosovo": ("XK", "XKX", None)}
+
+# Countries in the partner lists that unfpa_countries.csv doesn't cover
+EXTRA_COUNTRIES = [
+    {"Country_Name": "Kosovo", "Continent": "Europe", "Country": "kosovo"},
+]
+
+# unfpa_countries.csv leaves these as "Unknown"
+CONTINENT_OVERRIDES = {
+    "Myanmar": "Asia",
+    "Sint Maarten (Dutch part)": "North America",
+    "State of Palestine1": "Asia",
+    "Timor-Leste": "Asia",
+    "Western Sahara": "Africa",
+}
+
+
+def normalize_name(name):
+    """Portal slug, e.g. "Côte d'Ivoire" -> "côte-divoire"."""
+    stop_words = {"and", "of", "the"}
+
+    # Remove anything in parentheses
+    name = re.sub(r"\(.*?\)", "", name)
+
+    # Convert to lowercase
+    name = name.lower()
+
+    # Remove all special characters except hyphens and spaces
+    name = re.sub(r"[^\w\s-]", "", name)
+
+    # Remove stop words
+    words = [word for word in name.split() if word not in stop_words]
+
+    # Replace spaces with hyphens
+    return "-".join(words)
+
+
+@lru_cache(maxsize=None)
+def alias_key(name: str) -> str:
+    """
+    Looser key than the slug for matching spellings across sources: accents,
+    punctuation, footnote digits and stop words are dropped, but words in
+    parentheses are kept so "Korea (Republic of)" stays distinct.
+    """
+    name = unicodedata.normalize("NFKD", str(name))
+    name = "".join(c for c in name if not unicodedata.combining(c))
+    name = name.casefold().replace("&", " and ").replace("’", "'")
+    name = re.sub(r"(?<=[a-z])\d+$", "", name.strip())
+    name = re.sub(r"'", "", name)
+    words = re.sub(r"[^a-z0-9]+", " ", name).split()
+    return " ".join(w for w in words if w not in {"and", "of", "the"})
+
+
+def _lookup(**kwargs):
+    try:
+        if "name" in kwargs:
+            return pycountry.countries.lookup(kwargs["name"])
+        return pycountry.countries.get(**kwargs)
+    except LookupError:
+        return None
+
+
+def iso_codes(display_name) -> tuple:
+    """(alpha_2, alpha_3, M49) for a display name; Nones when unresolved."""
+    if display_name in NON_ISO_CODES:
+        return NON_ISO_CODES[display_name]
+    if pycountry is None:
+        return None, None, None
+    if display_name in ISO2_OVERRIDES:
+        record = _lookup(alpha_2=ISO2_OVERRIDES[display_name])
+    else:
+        candidates = [
+            display_name,
+            SPECIAL_CASES.get(display_name, display_name),
+            re.sub(r"\(.*?\)", "", display_name).strip(),
+        ]
+        record = next(filter(None, (_lookup(name=c) for c in candidates)), None)
+    if record is None:
+        return None, None, None
+    return record.alpha_2, record.alpha_3, record.numeric
+
+
+# === Dimension table ===
+@lru_cache(maxsize=1)
+def country_table() -> pd.DataFrame:
+    """One row per UNFPA country: slug, display name, ISO codes and continent."""
+    df = pd.concat(
+        [pd.read_csv(COUNTRIES_PATH), pd.DataFrame(EXTRA_COUNTRIES)],
+        ignore_index=True,
+    )
+    df["Continent"] = (
+        df.Country_Name.map(CONTINENT_OVERRIDES).fillna(df.Continent).astype("category")
+    )
+    codes = [iso_codes(name) for name in df.Country_Name]
+    df[["ISO2", "ISO3", "M49"]] = pd.DataFrame(codes, dtype="string")
+    df["Country_Name"] = df.Country_Name.astype("string")
+    df = df[["Country", "Country_Name", "ISO2", "ISO3", "M49", "Continent"]]
+    return df.set_index("Country", drop=False)
+
+
+@lru_cache(maxsize=1)
+def alias_index() -> dict:
+    """alias_key -> slug over every known spelling; ambiguous keys are dropped."""
+    table = country_table()
+    candidates = {}
+
+    def add(alias, slug):
+        if isinstance(alias, str) and alias.strip():
+            candidates.setdefault(alias_key(alias), set()).add(slug)
+
+    for row in table.itertuples(index=False):
+        names = [row.Country_Name, row.Country.replace("-", " ")]
+        names.append(SPECIAL_CASES.get(row.Country_Name))
+        names.append(re.sub(r"\(.*?\)", "", row.Country_Name))
+        names.extend(EXTRA_ALIASES.get(row.Country_Name, []))
+        names.extend([row.ISO2, row.ISO3] if pd.notna(row.ISO2) else [])
+        record = _lookup(alpha_2=row.ISO2) if pycountry and pd.notna(row.ISO2) else None
+        if record is not None:
+            for attr in ("name", "official_name", "common_name"):
+                names.append(getattr(record, attr, None))
+        for name in names:
+            add(name, row.Country)
+
+    return {key: slugs.pop() for key, slugs in candidates.items() if len(slugs) == 1}
+
+
+# === Vectorized lookups ===
+def to_slug(values) -> pd.Series:
+    """Map any spelling to the canonical slug; unknown names become NaN."""
+    values = pd.Series(values)
+    index = alias_index()
+    # Each distinct spelling is resolved once, then broadcast with map
+    mapping = {name: index.get(alias_key(name)) for name in values.dropna().unique()}
+    return values.map(mapping)
+
+
+def attach(
+    df: pd.DataFrame, column: str = "Country_Name", fields=("Country", "Continent")
+) -> pd.DataFrame:
+    """Join dimension fields onto `df` by resolving `column` to slugs."""
+    fields = [f for f in fields if f != column]
+    dims = country_table()[fields].reset_index(drop=True)
+    dims["_slug"] = country_table().index
+    df = df.drop(columns=[f for f in fields if f in df])
+    df = df.assign(_slug=to_slug(df[column]).to_numpy())
+    return df.merge(dims, on="_slug", how="left").drop(columns="_slug")
+
+
+def get_continent(values) -> pd.Series:
+    return to_slug(values).map(country_table().Continent)
+
+
+def country_names() -> dict:
+    """slug -> display name."""
+    return country_table().Country_Name.to_dict()
+
+
+def unmatched(values) -> list:
+    values = pd.Series(values).dropna()
+    return sorted(values[to_slug(values).isna()].unique())
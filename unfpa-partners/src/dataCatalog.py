@@ -0,0 +1,254 @@
+import hashlib
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import pandas as pd
+
+# Anchored on this file so loaders work from any working directory
+DATA_DIR = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+)
+CATALOG_DIR = os.path.join(DATA_DIR, "processed", "catalog")
+MANIFEST_PATH = os.path.join(CATALOG_DIR, "manifest.json")
+
+
+def parse_amount(values: pd.Series) -> pd.Series:
+    """'117,450.00' -> 117450.0; anything unparseable becomes NaN."""
+    text = values.astype("string").str.replace(r"[,$\s]", "", regex=True)
+    return pd.to_numeric(text, errors="coerce").astype("float64")
+
+
+def _categorize(df: pd.DataFrame, columns) -> pd.DataFrame:
+    for column in columns:
+        if column in df:
+            df[column] = df[column].astype("category")
+    return df
+
+
+# === Table definitions ===
+@dataclass
+class Table:
+    source: str  # relative to DATA_DIR
+    clean: Callable[[pd.DataFrame], pd.DataFrame] = lambda df: df
+    categories: list = field(default_factory=list)
+    read_options: dict = field(default_factory=dict)
+
+    @property
+    def source_path(self) -> str:
+        return os.path.join(DATA_DIR, self.source)
+
+    def read(self) -> pd.DataFrame:
+        if self.source.endswith((".xls", ".xlsx", ".xlsb")):
+            df = pd.read_excel(self.source_path, **self.read_options)
+        else:
+            df = pd.read_csv(self.source_path, **self.read_options)
+        df = self.clean(df)
+        return _categorize(df, self.categories)
+
+
+def _clean_fundings(df):
+    for column in ["Total Spending", "UNFPA", "GOV", "NGO", "UN"]:
+        df[column] = pd.to_numeric(df[column], errors="coerce").astype("Int64")
+    df["Year"] = df["Year"].astype("int16")
+    return df
+
+
+def _clean_outcomes(df):
+    for column in df.columns.drop(["Country_Name", "Country"]):
+        df[column] = pd.to_numeric(df[column].replace("-", None), errors="coerce")
+    return df
+
+
+def _clean_partners(df):
+    df["Amount"] = parse_amount(df["Amount"])
+    return df
+
+
+def _clean_population(df):
+    df = df.rename(
+        columns={
+            "Country": "Country_Name",
+            "Survey Year": "Year",
+            "Total": "Population",
+        }
+    )
+    df["Year"] = df["Year"].astype("int16")
+    return df[["Country_Name", "Year", "Population"]]
+
+
+def _clean_maternal_deaths(df):
+    # Keep the SDG modelled series; DHS survey figures duplicate some years
+    df = df[df["Source Organization"] == "SDG"]
+    df = df.rename(
+        columns={"Country": "Country_Name", "Survey Year": "Year", "Sex: Female": "MMR"}
+    )
+    df["Year"] = df["Year"].astype("int16")
+    return df[["Country_Name", "Year", "MMR"]].reset_index(drop=True)
+
+
+def _clean_unicef_mmr(df):
+    df = df.rename(columns={"Geographic area": "Country_Name"})
+    df["Year"] = df["Year"].astype("int16")
+    return df[["Country_Name", "Year", "MMR"]]
+
+
+PARTNER_CATEGORIES = ["Country", "OrgType"]
+RAW_INDICATOR_COLUMNS = ["Country", "Survey Year", "Source Organization"]
+
+TABLES = {
+    "fundings": Table(
+        "unfpa_fundings_2015_2023.csv",
+        _clean_fundings,
+        ["Program", "Country", "Country_Name"],
+    ),
+    "outcomes": Table("unfpa_outcomes.csv", _clean_outcomes, ["Country"]),
+    "countries": Table("unfpa_countries.csv", categories=["Continent"]),
+    "partners": Table("unfpa_partners.csv", _clean_partners, PARTNER_CATEGORIES),
+    "partners_v1": Table("unfpa_partners-v1.csv", _clean_partners, PARTNER_CATEGORIES),
+    "partners_ngos": Table(
+        "unfpa_partners-ngos.csv", _clean_partners, PARTNER_CATEGORIES
+    ),
+    "unicef_mmr": Table(
+        "UNICEF_GLOBAL_MMR_2000-2024.xlsx",
+        _clean_unicef_mmr,
+        read_options={"sheet_name": "Sheet1", "usecols": "A:D"},
+    ),
+    "population": Table(
+        "raw/population-size.csv",
+        _clean_population,
+        read_options={"usecols": ["Country", "Survey Year", "Total"]},
+    ),
+    "maternal_deaths": Table(
+        "raw/maternal-deaths.csv",
+        _clean_maternal_deaths,
+        read_options={"usecols": RAW_INDICATOR_COLUMNS + ["Sex: Female"]},
+    ),
+}
+
+
+# === Manifest ===
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _load_manifest() -> dict:
+    if os.path.exists(MANIFEST_PATH):
+        with open(MANIFEST_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def _save_manifest(manifest: dict):
+    os.makedirs(CATALOG_DIR, exist_ok=True)
+    tmp_path = f"{MANIFEST_PATH}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+
+def parquet_path(name: str) -> str:
+    return os.path.join(CATALOG_DIR, f"{name}.parquet")
+
+
+def is_fresh(name: str, manifest: Optional[dict] = None) -> bool:
+    """
+    True when the Parquet copy matches its source. Size and mtime are checked
+    first so that an untouched source is never re-hashed.
+    """
+    manifest = _load_manifest() if manifest is None else manifest
+    entry = manifest.get(name)
+    source = TABLES[name].source_path
+    if not entry or not os.path.exists(parquet_path(name)):
+        return False
+    stat = os.stat(source)
+    if entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+        return True
+    if file_hash(source) != entry["sha256"]:
+        return False
+    # Touched but unchanged: refresh the stat so the next check is cheap again
+    entry.update(size=stat.st_size, mtime=stat.st_mtime)
+    _save_manifest(manifest)
+    return True
+
+
+def build(name: str, force: bool = False) -> bool:
+    """Convert one source to Parquet; returns True if it was rebuilt."""
+    manifest = _load_manifest()
+    if not force and is_fresh(name, manifest):
+        return False
+    table = TABLES[name]
+    stat = os.stat(table.source_path)
+    df = table.read()
+    os.makedirs(CATALOG_DIR, exist_ok=True)
+    tmp_path = f"{parquet_path(name)}.tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, parquet_path(name))
+    manifest[name] = {
+        "source": table.source,
+        "sha256": file_hash(table.source_path),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "rows": len(df),
+    }
+    _save_manifest(manifest)
+    return True
+
+
+def build_all(force: bool = False) -> dict:
+    status = {}
+    for name in TABLES:
+        try:
+            status[name] = "rebuilt" if build(name, force) else "fresh"
+        except (FileNotFoundError, ImportError) as e:
+            # e.g. the Excel engine isn't installed
+            status[name] = f"skipped ({e.__class__.__name__})"
+    return status
+
+
+# === Loaders ===
+def load(name: str, columns=None, filters=None) -> pd.DataFrame:
+    """
+    Load a catalog table, rebuilding it first if its source changed.
+    `filters` uses the pyarrow form, e.g. [("Year", ">=", 2020)].
+    """
+    if name not in TABLES:
+        raise KeyError(f"Unknown table {name!r}; choose from {sorted(TABLES)}")
+    build(name)
+    return pd.read_parquet(parquet_path(name), columns=columns, filters=filters)
+
+
+def load_fundings(columns=None, filters=None) -> pd.DataFrame:
+    return load("fundings", columns, filters)
+
+
+def load_outcomes(columns=None, filters=None) -> pd.DataFrame:
+    return load("outcomes", columns, filters)
+
+
+def load_countries(columns=None, filters=None) -> pd.DataFrame:
+    return load("countries", columns, filters)
+
+
+def load_partners(columns=None, filters=None, version="partners") -> pd.DataFrame:
+    """`version` is "partners", "partners_v1" or "partners_ngos"."""
+    return load(version, columns, filters)
+
+
+if __name__ == "__main__":
+    force = "--force" in sys.argv
+    for name, status in build_all(force).items():
+        print(f"{name}: {status}")
+
+    for name in ["fundings", "outcomes", "partners"]:
+        start = time.perf_counter()
+        df = load(name)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"load({name!r}): {df.shape} in {elapsed:.1f} ms")
@@ -0,0 +1,153 @@
+import asyncio
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+import openai
+
+
+# === Rate limiting ===
+class RateLimiter:
+    """Sliding one-minute window over request count and token count."""
+
+    def __init__(self, rpm: Optional[int] = None, tpm: Optional[int] = None):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._events = deque()  # (timestamp, tokens)
+        self._tokens_in_window = 0
+        self._lock = asyncio.Lock()
+
+    def _prune(self, now):
+        while self._events and now - self._events[0][0] >= 60:
+            _, tokens = self._events.popleft()
+            self._tokens_in_window -= tokens
+
+    def _wait_time(self, now, tokens):
+        waits = [0.0]
+        if self.rpm and len(self._events) >= self.rpm:
+            waits.append(60 - (now - self._events[0][0]))
+        if self.tpm and self._events and self._tokens_in_window + tokens > self.tpm:
+            # Free up enough of the window for this request to fit
+            freed = self._tokens_in_window
+            for ts, used in self._events:
+                freed -= used
+                if freed + tokens <= self.tpm:
+                    waits.append(60 - (now - ts))
+                    break
+            else:
+                # Oversized request: run it alone once the window is empty
+                waits.append(60 - (now - self._events[-1][0]))
+        return max(waits)
+
+    async def acquire(self, tokens: int = 0):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._prune(now)
+                wait = self._wait_time(now, tokens)
+                if wait <= 0:
+                    self._events.append((now, tokens))
+                    self._tokens_in_window += tokens
+                    return
+                await asyncio.sleep(wait)
+
+
+# === Retry policy ===
+def is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code == 429 or exc.status_code >= 500
+    return False
+
+
+def backoff_delay(attempt: int, exc: Exception, base=1.0, cap=60.0) -> float:
+    # Honor the server's Retry-After hint when it sends one
+    response = getattr(exc, "response", None)
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return float(retry_after) + random.uniform(0, base)
+            except ValueError:
+                pass
+    # Full jitter exponential backoff
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+@dataclass
+class EnrichResult:
+    index: int
+    item: Any
+    value: Any = None
+    error: Optional[Exception] = None
+    attempts: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+# === Engine ===
+async def run_enrichment(
+    items: list,
+    worker: Callable[[Any], Awaitable[Any]],
+    concurrency: int = 8,
+    rpm: Optional[int] = None,
+    tpm: Optional[int] = None,
+    estimate_tokens: Optional[Callable[[Any], int]] = None,
+    max_retries: int = 5,
+    on_result: Optional[Callable[[EnrichResult], None]] = None,
+    progress: Optional[Callable[[], None]] = None,
+    stop_on: tuple = (),
+) -> list:
+    """
+    Run `worker(item)` for every item with bounded concurrency, a shared
+    RPM/TPM limiter and jittered retries on 429/5xx.
+    Returns one EnrichResult per item, in input order.
+
+    An exception of a `stop_on` type (e.g. a spent budget) stops the run: no
+    new items start, the affected and unstarted items get no `on_result`
+    call, and the exception is re-raised once in-flight items finish.
+    """
+    limiter = RateLimiter(rpm=rpm, tpm=tpm)
+    semaphore = asyncio.Semaphore(concurrency)
+    results = [None] * len(items)
+    stopped = []
+
+    async def run_one(index, item):
+        result = EnrichResult(index=index, item=item)
+        tokens = estimate_tokens(item) if estimate_tokens else 0
+        start = time.monotonic()
+        async with semaphore:
+            for attempt in range(max_retries + 1):
+                if stopped:
+                    return
+                await limiter.acquire(tokens)
+                result.attempts = attempt + 1
+                try:
+                    result.value = await worker(item)
+                    result.error = None
+                    break
+                except stop_on as e:
+                    stopped.append(e)
+                    return
+                except Exception as e:
+                    result.error = e
+                    if attempt == max_retries or not is_retryable(e):
+                        break
+                    await asyncio.sleep(backoff_delay(attempt, e))
+        result.elapsed = time.monotonic() - start
+        results[index] = result
+        if on_result:
+            on_result(result)
+        if progress:
+            progress()
+
+    await asyncio.gather(*(run_one(i, item) for i, item in enumerate(items)))
+    if stopped:
+        raise stopped[0]
+    return results
@@ -0,0 +1,278 @@
+import asyncio
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from countries import country_names
+from dataCatalog import DATA_DIR
+from fundingScraper import COLUMNS, YEARS, FundingScraper
+from portalParser import parse_portal_page, year_block
+
+# partitions/{year}/{country}.parquet, combined/{year}.parquet, manifest.json
+STORE_DIR = os.path.join(DATA_DIR, "processed", "fundings")
+
+MONEY_COLUMNS = ["Total Spending", "UNFPA", "GOV", "NGO", "UN"]
+# Country-years without data are checked again after this long; failed fetches sooner
+EMPTY_RETRY_DAYS = 30
+FAILED_RETRY_DAYS = 1
+
+
+def page_hash(html, year):
+    """Hash of the year's program block only, so page chrome changes don't count."""
+    block = year_block(html, year) if html else None
+    return hashlib.sha256(block).hexdigest() if block is not None else None
+
+
+def _timestamp(days=0.0) -> str:
+    moment = datetime.now(timezone.utc) + timedelta(days=days)
+    return moment.isoformat(timespec="seconds")
+
+
+def to_frame(rows) -> pd.DataFrame:
+    df = pd.DataFrame(rows, columns=COLUMNS)
+    for column in MONEY_COLUMNS:
+        df[column] = df[column].astype("int64")
+    df["Year"] = df["Year"].astype("int16")
+    df["Country_Name"] = df.Country.map(country_names())
+    return df
+
+
+class FundingStore:
+    """
+    Funding rows partitioned by year and country, plus one combined file per
+    year. The manifest records the page hash of every country-year and which
+    years need their combined file rebuilt. Country-years without data, or
+    whose fetch failed, are recorded too, with a date after which to retry.
+    """
+
+    def __init__(self, store_dir=STORE_DIR):
+        self.partitions_dir = os.path.join(store_dir, "partitions")
+        self.combined_dir = os.path.join(store_dir, "combined")
+        self.manifest_path = os.path.join(store_dir, "manifest.json")
+        self.manifest = {"pages": {}, "dirty_years": []}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as f:
+                self.manifest = json.load(f)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    @staticmethod
+    def key(country, year) -> str:
+        return f"{country}/{year}"
+
+    def has(self, country, year) -> bool:
+        return self.key(country, year) in self.manifest["pages"]
+
+    def is_due(self, country, year) -> bool:
+        """Never fetched, or recorded without data and past its retry date."""
+        entry = self.manifest["pages"].get(self.key(country, year))
+        if entry is None:
+            return True
+        retry_after = entry.get("retry_after")
+        return retry_after is not None and retry_after <= _timestamp()
+
+    def digest(self, country, year):
+        return self.manifest["pages"].get(self.key(country, year), {}).get("sha256")
+
+    def partition_path(self, country, year) -> str:
+        return os.path.join(self.partitions_dir, str(year), f"{country}.parquet")
+
+    def write(self, country, year, rows, digest, source="portal"):
+        path = self.partition_path(country, year)
+        changed = bool(rows) or os.path.exists(path)
+        if rows:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            to_frame(rows).to_parquet(f"{path}.tmp", index=False)
+            os.replace(f"{path}.tmp", path)
+        elif os.path.exists(path):
+            os.remove(path)
+        entry = {
+            "sha256": digest,
+            "rows": len(rows),
+            "source": source,
+            "updated": _timestamp(),
+        }
+        if not rows:
+            entry["retry_after"] = _timestamp(EMPTY_RETRY_DAYS)
+        self.manifest["pages"][self.key(country, year)] = entry
+        if changed and int(year) not in self.manifest["dirty_years"]:
+            self.manifest["dirty_years"].append(int(year))
+
+    def mark_failed(self, country, year):
+        """Record a failed fetch; rows already stored for the pair are kept."""
+        entry = self.manifest["pages"].get(self.key(country, year))
+        if entry and entry["rows"]:
+            return
+        self.manifest["pages"][self.key(country, year)] = {
+            "sha256": None,
+            "rows": 0,
+            "source": "failed",
+            "updated": _timestamp(),
+            "retry_after": _timestamp(FAILED_RETRY_DAYS),
+        }
+
+    def ingest_page(self, html, country, year) -> str:
+        """Store one fetched page; returns new, changed, unchanged or empty."""
+        digest = page_hash(html, year)
+        known = self.has(country, year)
+        if known and digest is not None and digest == self.digest(country, year):
+            return "unchanged"
+        rows = parse_portal_page(html, country, year) if digest else []
+        self.write(country, year, rows, digest)
+        if not rows:
+            return "empty"
+        return "changed" if known else "new"
+
+    def materialize(self) -> list:
+        """Rebuild the combined file of every year touched since the last call."""
+        years = sorted(self.manifest["dirty_years"])
+        os.makedirs(self.combined_dir, exist_ok=True)
+        for year in years:
+            paths = sorted(glob.glob(os.path.join(self.partitions_dir, str(year), "*")))
+            paths = [p for p in paths if p.endswith(".parquet")]
+            path = os.path.join(self.combined_dir, f"{year}.parquet")
+            if paths:
+                df = pd.concat([pd.read_parquet(p) for p in paths], ignore_index=True)
+                df.to_parquet(f"{path}.tmp", index=False)
+                os.replace(f"{path}.tmp", path)
+            elif os.path.exists(path):
+                os.remove(path)
+        self.manifest["dirty_years"] = []
+        self.save()
+        return years
+
+    def years(self) -> list:
+        return sorted(
+            int(os.path.basename(p)[: -len(".parquet")])
+            for p in glob.glob(os.path.join(self.combined_dir, "*.parquet"))
+        )
+
+    def load(self, years=None, columns=None) -> pd.DataFrame:
+        """Combined funding table; only the requested years' files are read."""
+        years = self.years() if years is None else years
+        paths = [os.path.join(self.combined_dir, f"{year}.parquet") for year in years]
+        frames = [
+            pd.read_parquet(p, columns=columns) for p in paths if os.path.exists(p)
+        ]
+        if not frames:
+            return pd.DataFrame(columns=columns or COLUMNS + ["Country_Name"])
+        return pd.concat(frames, ignore_index=True)
+
+
+# === Pipelines ===
+def import_csv(store: FundingStore, paths, country_slugs=None) -> int:
+    """
+    Seed the store from existing unfpa_fundings_{year}.csv files without
+    scraping. Countries missing from a year's file are recorded as empty.
+    """
+    country_slugs = list(country_slugs or country_names())
+    imported = 0
+    for path in paths:
+        df = pd.read_csv(path)
+        for (country, year), group in df.groupby(["Country", "Year"]):
+            if store.has(country, year):
+                continue
+            rows = group[COLUMNS].to_dict("records")
+            store.write(country, year, rows, digest=None, source="csv")
+            imported += 1
+        for year, group in df.groupby("Year"):
+            for country in sorted(set(country_slugs) - set(group.Country)):
+                if not store.has(country, year):
+                    store.write(country, year, [], digest=None, source="csv")
+    store.save()
+    return imported
+
+
+def ingest_saved(store: FundingStore, raw_dir) -> dict:
+    """Re-parse saved {country}_{year}.html pages whose program block changed."""
+    counts = {}
+    for path in sorted(glob.glob(os.path.join(raw_dir, "*.html"))):
+        country, year = os.path.basename(path)[: -len(".html")].rsplit("_", 1)
+        with open(path, encoding="utf-8") as f:
+            status = store.ingest_page(f.read(), country, year)
+        counts[status] = counts.get(status, 0) + 1
+    store.save()
+    return counts
+
+
+async def ingest(
+    store: FundingStore, years=YEARS, country_slugs=None, refresh_years=()
+) -> dict:
+    """
+    Fetch only country-years the store hasn't seen or that are due for a
+    retry, plus every country of `refresh_years` (e.g. the current year,
+    whose figures still move).
+    """
+    country_slugs = list(country_slugs or country_names())
+    pairs = [
+        (country, year)
+        for year in years
+        for country in country_slugs
+        if year in refresh_years or store.is_due(country, year)
+    ]
+    counts = {"skipped": len(years) * len(country_slugs) - len(pairs)}
+    if not pairs:
+        return counts
+
+    scraper = FundingScraper()
+
+    async def fetch(country, year):
+        try:
+            html = await scraper.fetch_page(country, year)
+        except Exception as e:
+            print(f"Failed to fetch {country} {year}: {e}")
+            store.mark_failed(country, year)
+            return "failed"
+        return store.ingest_page(html, country, year)
+
+    try:
+        await scraper.start()
+        statuses = await asyncio.gather(*(fetch(c, y) for c, y in pairs))
+    finally:
+        await scraper.close()
+        store.save()
+    for status in statuses:
+        counts[status] = counts.get(status, 0) + 1
+    return counts
+
+
+def export_csv(store: FundingStore, data_dir=DATA_DIR) -> str:
+    df = store.load()
+    years = store.years()
+    path = os.path.join(data_dir, f"unfpa_fundings_{years[0]}_{years[-1]}.csv")
+    df.to_csv(path, index=False)
+    return path
+
+
+if __name__ == "__main__":
+    # fundingIngest.py [year ...] [--refresh YEAR] [--seed-csv] [--from-raw DIR]
+    args = sys.argv[1:]
+    store = FundingStore()
+    start = time.perf_counter()
+    if "--seed-csv" in args:
+        paths = sorted(glob.glob(os.path.join(DATA_DIR, "unfpa_fundings_20??.csv")))
+        print(f"Imported {import_csv(store, paths)} country-years from CSV")
+    if "--from-raw" in args:
+        raw_dir = args[args.index("--from-raw") + 1]
+        print(f"Saved pages: {ingest_saved(store, raw_dir)}")
+    else:
+        refresh = [int(args[i + 1]) for i, a in enumerate(args) if a == "--refresh"]
+        years = [int(a) for a in args if a.isdigit() and int(a) not in refresh]
+        years = sorted(set(years + refresh)) or YEARS
+        print(f"Portal: {asyncio.run(ingest(store, years, refresh_years=refresh))}")
+
+    rebuilt = store.materialize()
+    print(f"Rebuilt combined years {rebuilt} in {time.perf_counter() - start:.1f}s")
+    if rebuilt:
+        print(f"Wrote {export_csv(store)}")
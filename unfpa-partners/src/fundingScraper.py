@@ -0,0 +1,289 @@
+import asyncio
+import os
+import re
+import sys
+import time
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+from bs4 import BeautifulSoup
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import Page
+
+from browserPool import BrowserPool, block_resources
+from countries import country_names
+from enrichEngine import RateLimiter
+from portalParser import parse_portal_page as parse_portal_page_fast
+from tieredFetch import TieredFetcher
+
+PORTAL_URL = "https://www.unfpa.org/data/transparency-portal/unfpa-{country}"
+DATA_DIR = "../data"
+RAW_DIR = "../data/raw/portal"
+YEARS = list(range(2015, 2024))
+
+# Politeness towards www.unfpa.org
+MAX_CONCURRENT_REQUESTS = 4
+REQUESTS_PER_MINUTE = 120
+POOL_SIZE = 4
+FORM_TIMEOUT_MS = 20000
+
+COLUMNS = [
+    "Total Spending",
+    "UNFPA",
+    "GOV",
+    "NGO",
+    "UN",
+    "Core Resources",
+    "Non-core Resources",
+    "Program",
+    "Country",
+    "Year",
+]
+
+# slug -> display name for every country on the portal
+countries = country_names()
+
+
+# === Parsing ===
+def parse_program_data_block(html_str):
+    soup = BeautifulSoup(html_str, "html.parser")
+
+    # Initialize all expected keys with 0
+    data = {
+        "Total Spending": 0,
+        "UNFPA": 0,
+        "GOV": 0,
+        "NGO": 0,
+        "UN": 0,
+        "Core Resources": 0.0,
+        "Non-core Resources": 0.0,
+    }
+
+    # 1. Total Spending
+    total_elem = soup.find(
+        "div", class_="projects-project-spec-key", string="Total Spending:"
+    )
+    if total_elem:
+        value_elem = total_elem.find_next_sibling(
+            "div", class_="projects-project-spec-value"
+        )
+        if value_elem:
+            value_text = (
+                value_elem.get_text(strip=True).replace("$", "").replace(",", "")
+            )
+            try:
+                data["Total Spending"] = int(float(value_text))
+            except ValueError:
+                pass
+
+    # 2. Implemented by (extract dollar values by org name)
+    impl_elem = soup.find(
+        "div", class_="projects-project-spec-key", string="Implemented by:"
+    )
+    if impl_elem:
+        value_elem = impl_elem.find_next_sibling(
+            "div", class_="projects-project-spec-value"
+        )
+        if value_elem:
+            for org in ["UNFPA", "GOV", "NGO", "UN"]:
+                match = re.search(rf"{org}\s*\$([\d,]+)", value_elem.get_text())
+                if match:
+                    data[org] = int(match.group(1).replace(",", ""))
+
+    # 3. Funded by (extract percentages)
+    fund_elem = soup.find(
+        "div", class_="projects-project-spec-key", string="Funded by:"
+    )
+    if fund_elem:
+        value_elem = fund_elem.find_next_sibling(
+            "div", class_="projects-project-spec-value"
+        )
+        if value_elem:
+            spans = value_elem.find_all("span")
+            for i in range(0, len(spans), 2):
+                try:
+                    label = spans[i].get_text(strip=True)
+                    percent_text = (
+                        spans[i + 1]
+                        .get_text(strip=True)
+                        .replace("(", "")
+                        .replace(")", "")
+                        .replace("%", "")
+                    )
+                    percent = float(percent_text) / 100.0
+                    if label in data:
+                        data[label] = percent
+                except (IndexError, ValueError):
+                    continue
+
+    return data
+
+
+def parse_portal_page(html, country, year):
+    """
+    Program rows of one country page, as scraped by the original notebook.
+    Kept as the reference for portalParser, which does the same with lxml.
+    """
+    year = str(year)
+    soup = BeautifulSoup(html, "html.parser")
+    program_blocks = soup.find(
+        "div", class_=f"program-year-wrapper program-wrapper-{year}"
+    )
+    if program_blocks is None:
+        return []
+
+    programs = []
+    for block in program_blocks.find_all("div", class_="program-child-wrapper"):
+        title = block.find("div", class_="program-parent-title").get_text(strip=True)
+        # Only the program total, not its sub-programs
+        total_html = str(block.find_all("div", class_="program-data-wrapper")[0])
+        data_dic = parse_program_data_block(total_html)
+        data_dic["Program"] = title
+        data_dic["Country"] = country
+        data_dic["Year"] = year
+        programs.append(data_dic)
+    return programs
+
+
+# === Fetching ===
+def portal_url(country, year):
+    return f"{PORTAL_URL.format(country=country)}?year={year}"
+
+
+def year_marker(year):
+    return rf"program-wrapper-{year}\b"
+
+
+YEAR_OPTIONS = re.compile(r'<select[^>]*id="edit-year".*?</select>', re.S)
+
+
+def year_missing(url: str, html: str) -> bool:
+    """The country page's year form exists but does not offer this year."""
+    year = parse_qs(urlparse(url).query)["year"][0]
+    form = YEAR_OPTIONS.search(html)
+    return bool(form) and f'value="{year}"' not in form.group(0)
+
+
+async def submit_year_form(page: Page, url: str) -> str:
+    """
+    Browser fallback: load the country page and submit the year form. The
+    session is long-lived, so the cookie popup only shows up on its first page.
+    """
+    year = parse_qs(urlparse(url).query)["year"][0]
+    await page.goto(url, wait_until="domcontentloaded", timeout=FORM_TIMEOUT_MS)
+
+    close_button = page.locator("#cookies-popup .popup-close")
+    if await close_button.count() and await close_button.first.is_visible():
+        await close_button.first.click()
+
+    await page.select_option("#edit-year", year)
+    try:
+        await page.click("#edit-submit", timeout=2000)
+    except PlaywrightError:
+        # Click intercepted by an overlay
+        await page.eval_on_selector("#edit-submit", "el => el.click()")
+    await page.wait_for_selector(
+        f"div.program-wrapper-{year}", state="attached", timeout=FORM_TIMEOUT_MS
+    )
+    return await page.content()
+
+
+class FundingScraper:
+    """
+    Scrape the transparency portal for many (country, year) pairs at once.
+    Pages are requested directly with the year as a query parameter; when the
+    portal ignores it, the fetcher escalates to a small pool of long-lived
+    browser sessions that submit the year form instead. All requests to the
+    host share one concurrency cap and one requests-per-minute budget.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = MAX_CONCURRENT_REQUESTS,
+        rpm: int = REQUESTS_PER_MINUTE,
+        pool_size: int = POOL_SIZE,
+        raw_dir=RAW_DIR,
+    ):
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.limiter = RateLimiter(rpm=rpm)
+        self.raw_dir = raw_dir
+        self.pool = BrowserPool(size=pool_size, on_context=block_resources)
+        self.fetcher = TieredFetcher(
+            pool=self.pool, browser_fetch=submit_year_form, is_empty=year_missing
+        )
+        self.missing = []
+
+    async def start(self):
+        await self.pool.start()
+        return self
+
+    async def fetch_page(self, country, year) -> str:
+        async with self.semaphore:
+            await self.limiter.acquire()
+            html = await self.fetcher.fetch(
+                portal_url(country, year), markers=[year_marker(year)]
+            )
+        if self.raw_dir and html:
+            os.makedirs(self.raw_dir, exist_ok=True)
+            path = os.path.join(self.raw_dir, f"{country}_{year}.html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(html)
+        return html
+
+    async def scrape(self, country, year) -> list:
+        try:
+            html = await self.fetch_page(country, year)
+        except Exception as e:
+            print(f"Failed to fetch {country} {year}: {e}")
+            self.missing.append((country, year))
+            return []
+        programs = parse_portal_page_fast(html, country, year) if html else []
+        if not programs:
+            print(f"No Data Found for: {country} {year}")
+            self.missing.append((country, year))
+        return programs
+
+    async def scrape_year(self, countries, year) -> pd.DataFrame:
+        results = await asyncio.gather(
+            *(self.scrape(country, year) for country in countries)
+        )
+        rows = [row for programs in results for row in programs]
+        return pd.DataFrame(rows, columns=COLUMNS)
+
+    async def close(self):
+        self.fetcher.report()
+        await self.fetcher.close()
+
+
+async def scrape_fundings(years=YEARS, country_slugs=None, data_dir=DATA_DIR):
+    """Refresh unfpa_fundings_{year}.csv for each year and the combined file."""
+    country_slugs = list(country_slugs or countries)
+    scraper = FundingScraper()
+    start = time.perf_counter()
+    frames = []
+    try:
+        await scraper.start()
+        # Years run one after another so each file is written as soon as it is done
+        for year in years:
+            df = await scraper.scrape_year(country_slugs, year)
+            df["Country_Name"] = df.Country.map(countries)
+            df.to_csv(f"{data_dir}/unfpa_fundings_{year}.csv", index=False)
+            print(f"{year}: {len(df)} programs, {df.Country.nunique()} countries")
+            frames.append(df)
+    finally:
+        await scraper.close()
+
+    df = pd.concat(frames).reset_index(drop=True)
+    if len(years) > 1:
+        path = f"{data_dir}/unfpa_fundings_{min(years)}_{max(years)}.csv"
+        df.to_csv(path, index=False)
+    print(
+        f"Scraped {len(df)} programs in {time.perf_counter() - start:.0f}s, "
+        f"{len(scraper.missing)} pages without data"
+    )
+    return df
+
+
+if __name__ == "__main__":
+    years = [int(y) for y in sys.argv[1:]] or YEARS
+    asyncio.run(scrape_fundings(years))
@@ -1,18 +1,34 @@
 import asyncio
 import json
 import os
+import re
 import nest_asyncio
 import pprint
 import base64
 from io import BytesIO
 import pandas as pd
 from playwright.async_api import async_playwright
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from PIL import Image
 from tabulate import tabulate
 from IPython.display import display, HTML, Markdown
 from pydantic import BaseModel
 from helper import visualizeCourses
+from browserPool import (
+    BrowserPool,
+    BLOCK_REQUESTS,
+    BLOCKED_URL_PATTERNS,
+    BlockStats,
+    CHROMIUM_ARGS,
+    POOL_SIZE,
+    READINESS,
+    block_resources,
+    load_page,
+)
+from llmCache import get_cache
+from llmMeter import metered, print_stats as print_llm_usage
+from htmlReduce import chunk_html, count_tokens, reduce_html
+from tieredFetch import TieredFetcher
 
 from dotenv import load_dotenv
 
@@ -24,42 +40,75 @@ load_dotenv(f"{HOME_DIR}/.env")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 SERPAPI_API_KEY = os.getenv("SERPAPI_API_KEY")
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+client = metered(OpenAI(api_key=OPENAI_API_KEY), "getOrgData")
+async_client = metered(AsyncOpenAI(api_key=OPENAI_API_KEY), "getOrgData")
+CHUNK_CONCURRENCY = 4
 
 class WebScraperAgent:
-    def __init__(self):
+    def __init__(
+        self,
+        pool_size=POOL_SIZE,
+        readiness=READINESS,
+        selector=None,
+        block=BLOCK_REQUESTS,
+        block_patterns=BLOCKED_URL_PATTERNS,
+    ):
         self.playwright = None
         self.browser = None
         self.page = None
+        self.pool_size = pool_size
+        self.pool = None
+        self.readiness = readiness
+        self.selector = selector
+        self.block = block
+        self.block_patterns = block_patterns
+        self.block_stats = BlockStats()
+        self.timings = []
+        self.fetcher = None
+
+    async def _setup_target(self, target):
+        if self.block:
+            await block_resources(
+                target, url_patterns=self.block_patterns, stats=self.block_stats
+            )
 
     async def init_browser(self):
         self.playwright = await async_playwright().start()
         self.browser = await self.playwright.chromium.launch(
             headless=True,
-            args=[
-                "--disable-dev-shm-usage",
-                "--no-sandbox",
-                "--disable-setuid-sandbox",
-                "--disable-accelerated-2d-canvas",
-                "--disable-gpu",
-                "--no-zygote",
-                "--disable-audio-output",
-                "--disable-software-rasterizer",
-                "--disable-webgl",
-                "--disable-web-security",
-                "--disable-features=LazyFrameLoading",
-                "--disable-features=IsolateOrigins",
-                "--disable-background-networking",
-            ],
+            args=CHROMIUM_ARGS,
         )
         self.page = await self.browser.new_page()
+        await self._setup_target(self.page)
 
     async def scrape_content(self, url):
         if not self.page or self.page.is_closed():
             await self.init_browser()
-        await self.page.goto(url, wait_until="load")
-        await self.page.wait_for_timeout(2000)  # Wait for dynamic content
-        return await self.page.content()
+        html, timing = await load_page(self.page, url, self.readiness, self.selector)
+        self.timings.append(timing)
+        return html
+
+    async def scrape_many(self, urls):
+        """Fetch several URLs in parallel through a pool of browser contexts."""
+        if self.pool is None:
+            self.pool = await BrowserPool(
+                size=self.pool_size, on_context=self._setup_target
+            ).start()
+
+        async def fetch(page, url):
+            html, timing = await load_page(page, url, self.readiness, self.selector)
+            self.timings.append(timing)
+            return html
+
+        return await self.pool.map(fetch, urls)
+
+    async def fetch_html(self, url, markers=()):
+        """Plain HTTP when the markers are in the static HTML, the browser otherwise."""
+        if self.fetcher is None:
+            self.fetcher = TieredFetcher(
+                markers, readiness=self.readiness, selector=self.selector
+            )
+        return await self.fetcher.fetch(url, markers)
 
     async def take_screenshot(self, path="screenshot.png"):
         await self.page.screenshot(path=path, full_page=True)
@@ -70,11 +119,19 @@ class WebScraperAgent:
         return screenshot_bytes
 
     async def close(self):
-        await self.browser.close()
-        await self.playwright.stop()
+        if self.browser:
+            await self.browser.close()
+            await self.playwright.stop()
+        if self.pool:
+            await self.pool.close()
+        if self.fetcher:
+            self.fetcher.report()
+            await self.fetcher.close()
         self.playwright = None
         self.browser = None
         self.page = None
+        self.pool = None
+        self.fetcher = None
         
 
 class DeeplearningCourse(BaseModel):
@@ -88,13 +145,23 @@ class DeeplearningCourse(BaseModel):
 class DeeplearningCourseList(BaseModel):
     courses: list[DeeplearningCourse]
    
+def course_key(course: DeeplearningCourse) -> str:
+    key = course.courseURL or course.title
+    return re.sub(r"[^a-z0-9/]", "", key.lower().rstrip("/"))
+
+
+def merge_course_lists(results) -> DeeplearningCourseList:
+    """Merge per-chunk results, keeping the first occurrence of each course."""
+    courses = {}
+    for result in results:
+        for course in result.courses if result else []:
+            courses.setdefault(course_key(course), course)
+    return DeeplearningCourseList(courses=list(courses.values()))
+
+
 async def process_with_llm(html, instructions, truncate=False):
-    completion = client.beta.chat.completions.parse(
-        model="gpt-4o-mini-2024-07-18",
-        messages=[
-            {
-                "role": "system",
-                "content": f"""
+    model_name = "gpt-4o-mini-2024-07-18"
+    system_prompt = f"""
             You are an expert web scraping agent. Your task is to:
             Extract relevant information from this HTML to JSON 
             following these instructions:
@@ -104,17 +171,45 @@ async def process_with_llm(html, instructions, truncate=False):
             the image URL and course URL for each of 
             all the courses for the deeplearning.ai website
 
-            Return ONLY valid JSON, no markdown or extra text.""",
-            },
-            {
-                "role": "user",
-                "content": html[:150000],  # Truncate to stay under token limits
-            },
-        ],
-        temperature=0.1,
-        response_format=DeeplearningCourseList,
+            Return ONLY valid JSON, no markdown or extra text."""
+
+    # Send only content-bearing markup, split on element boundaries
+    reduced = reduce_html(html)
+    chunks = chunk_html(reduced)
+    if truncate:
+        chunks = chunks[:1]
+    print(
+        f"HTML: {count_tokens(html)} tokens raw, {count_tokens(reduced)} reduced, "
+        f"{len(chunks)} chunk(s)"
     )
-    return completion.choices[0].message.parsed
+    semaphore = asyncio.Semaphore(CHUNK_CONCURRENCY)
+
+    async def extract(content):
+        async def compute():
+            async with semaphore:
+                completion = await async_client.beta.chat.completions.parse(
+                    model=model_name,
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": system_prompt,
+                        },
+                        {
+                            "role": "user",
+                            "content": content,
+                        },
+                    ],
+                    temperature=0.1,
+                    response_format=DeeplearningCourseList,
+                )
+            return completion.choices[0].message.parsed
+
+        return await get_cache().afetch(
+            content, system_prompt, model_name, DeeplearningCourseList, compute
+        )
+
+    results = await asyncio.gather(*(extract(chunk) for chunk in chunks))
+    return merge_course_lists(results)
 
 async def webscraper(target_url, instructions):
     result = None
@@ -138,7 +233,7 @@ async def webscraper(target_url, instructions):
         await scraper.close()
     return result, screenshot
 
- 
+
 scraper = WebScraperAgent()
 target_url = "https://www.deeplearning.ai/courses"  # Deeplearning AI courses
 base_url = "https://deeplearning.ai"
@@ -151,15 +246,8 @@ async def main():
     return result, screenshot
 
 
-result, screenshot = asyncio.run(main())
-
-
-html_content =  scraper.scrape_content(target_url)
-screenshot =  scraper.screenshot_buffer()
-result =  process_with_llm(
-    html_content, instructions, False
-)
-
-courses_data = [course.model_dump() for course in result.courses]
+if __name__ == "__main__":
+    result, screenshot = asyncio.run(main())
+    print_llm_usage()
 
-result, screenshot = webscraper(target_url, instructions)
\ No newline at end of file
+    courses_data = [course.model_dump() for course in result.courses]
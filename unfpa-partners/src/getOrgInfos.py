@@ -4,9 +4,14 @@ from openai import OpenAI
 from dotenv import load_dotenv
 
 # import openai
-import requests
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
+from htmlReduce import count_tokens
+from httpClient import get_client, print_stats as print_http_stats
+from llmCache import get_cache, make_key, print_stats
+from llmMeter import BudgetExceeded, metered, print_stats as print_llm_usage
+from orgDedup import cluster_names, dedup_report
+from runJournal import RunJournal, ERROR, atomic_write_csv, classify
 
 # Load environment variables
 HOME_DIR = os.path.expanduser("~")
@@ -15,6 +20,15 @@ load_dotenv(f"{HOME_DIR}/.env")
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 SERPAPI_API_KEY = os.getenv("SERPAPI_API_KEY")
+SERPAPI_URL = os.getenv("SERPAPI_URL", "https://serpapi.com/search")
+# Search results barely move; reruns reuse them for a month
+SERPAPI_TTL = 30 * 24 * 3600
+MODEL_NAME = "gpt-4o"
+
+# Pack several organizations into one request instead of one call per NGO
+BATCHED_EXTRACTION = True
+BATCH_TOKEN_BUDGET = 8000  # prompt tokens per batched request
+MAX_BATCH_SIZE = 20
 
 
 def get_org_names():
@@ -29,9 +43,9 @@ class NGOInfo(BaseModel):
 
 
 def search_ngos_serpapi(ngo_name):
-    url = "https://serpapi.com/search"
     params = {"q": ngo_name, "api_key": SERPAPI_API_KEY, "num": 5}
-    response = requests.get(url, params=params)
+    response = get_client().get(SERPAPI_URL, params=params, ttl=SERPAPI_TTL)
+    response.raise_for_status()
     data = response.json()
 
     # Combine snippets
@@ -59,7 +73,7 @@ def extract_ngo_info_with_gpt1(ngo_name, snippets_text):
         If not found, say "Not found".
         return a dictionary with keys: 'address' and 'website'.
         """
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    client = metered(OpenAI(api_key=os.getenv("OPENAI_API_KEY")), "getOrgInfos.gpt1")
     response = client.beta.chat.completions.parse(
         model="gpt-4o", messages=[{"role": "user", "content": prompt}], temperature=0
     )
@@ -80,22 +94,143 @@ def extract_ngo_info_with_gpt(ngo_name, snippets_text) -> NGOInfo:
     Return a JSON object with keys: 'address' and 'website'.
     """
 
-    client = OpenAI(api_key=OPENAI_API_KEY)
+    def compute():
+        client = metered(OpenAI(api_key=OPENAI_API_KEY), "getOrgInfos.extract")
+        response = client.beta.chat.completions.parse(
+            model="gpt-4o",
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0,
+            response_format=NGOInfo,
+        )
+
+        # Extract structured dict and parse with Pydantic
+        parsed_dict = response.choices[0].message.content
+        if isinstance(parsed_dict, str):
+            import json
+
+            parsed_dict = json.loads(parsed_dict)
+
+        return NGOInfo(**parsed_dict)
+
+    return get_cache().fetch(snippets_text, prompt, "gpt-4o", NGOInfo, compute)
+
+
+# === Batched extraction ===
+class NGOInfoItem(BaseModel):
+    org_id: int
+    address: Optional[str]
+    website: Optional[str]
+
+
+class NGOInfoBatch(BaseModel):
+    results: List[NGOInfoItem]
+
+
+BATCH_INSTRUCTIONS = """
+I searched online for each of the NGOs below. Each one is introduced by its
+org_id and name, followed by its search result summaries.
+
+For every NGO extract the most likely:
+1. Address of the NGO (or city/country if exact address not available)
+2. Official website URL
+
+If not found, say "Not found". Only use the summaries listed under that NGO.
+Return one entry per org_id in "results", with keys 'org_id', 'address' and 'website'.
+"""
+
+
+def format_org_block(org_id, ngo_name, snippets_text) -> str:
+    return f'### org_id {org_id}: "{ngo_name}"\n\n{snippets_text}\n'
+
+
+def build_batches(items, token_budget=BATCH_TOKEN_BUDGET, max_size=MAX_BATCH_SIZE):
+    """Greedily pack (name, snippets) items into batches under the token budget."""
+    budget = token_budget - count_tokens(BATCH_INSTRUCTIONS)
+    batches, current, used = [], [], 0
+    for name, snippets in items:
+        tokens = count_tokens(format_org_block(0, name, snippets))
+        if current and (used + tokens > budget or len(current) >= max_size):
+            batches.append(current)
+            current, used = [], 0
+        current.append((name, snippets))
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _batch_cache_key(ngo_name, snippets_text):
+    return make_key(snippets_text, BATCH_INSTRUCTIONS + ngo_name, MODEL_NAME, NGOInfo)
+
+
+def extract_batch_with_gpt(batch) -> dict:
+    """One request for a whole batch; raises if any org is missing from the answer."""
+    prompt = (
+        BATCH_INSTRUCTIONS
+        + "\n"
+        + "\n".join(
+            format_org_block(org_id, name, snippets)
+            for org_id, (name, snippets) in enumerate(batch)
+        )
+    )
+    client = metered(OpenAI(api_key=OPENAI_API_KEY), "getOrgInfos.batch")
     response = client.beta.chat.completions.parse(
-        model="gpt-4o",
+        model=MODEL_NAME,
         messages=[{"role": "user", "content": prompt}],
         temperature=0,
-        response_format=NGOInfo,
+        response_format=NGOInfoBatch,
     )
+    parsed = NGOInfoBatch.model_validate_json(response.choices[0].message.content)
+    by_id = {item.org_id: item for item in parsed.results}
+    missing = [org_id for org_id in range(len(batch)) if org_id not in by_id]
+    if missing:
+        raise ValueError(f"Batch answer is missing org_ids {missing}")
+    return {
+        name: NGOInfo(address=by_id[i].address, website=by_id[i].website)
+        for i, (name, _) in enumerate(batch)
+    }
+
 
-    # Extract structured dict and parse with Pydantic
-    parsed_dict = response.choices[0].message.content
-    if isinstance(parsed_dict, str):
-        import json
+def extract_ngo_infos_batched(items, on_result, stats=None):
+    """
+    Extract (name, snippets) items in token-budgeted batches. A failed batch
+    is split in half and retried until single organizations are left, whose
+    errors are then reported through on_result(name, None, error).
+    """
+    stats = stats if stats is not None else {"requests": 0}
+    cache = get_cache()
+    pending = []
+    for name, snippets in items:
+        cached = cache.get(_batch_cache_key(name, snippets))
+        if cached is not None:
+            on_result(name, NGOInfo.model_validate_json(cached), None)
+        else:
+            pending.append((name, snippets))
 
-        parsed_dict = json.loads(parsed_dict)
+    def run(batch):
+        stats["requests"] += 1
+        try:
+            results = extract_batch_with_gpt(batch)
+        except BudgetExceeded:
+            raise
+        except Exception as e:
+            if len(batch) == 1:
+                on_result(batch[0][0], None, e)
+                return
+            middle = len(batch) // 2
+            run(batch[:middle])
+            run(batch[middle:])
+            return
+        for name, snippets in batch:
+            info = results[name]
+            cache.put(
+                _batch_cache_key(name, snippets), info.model_dump_json(), MODEL_NAME
+            )
+            on_result(name, info, None)
 
-    return NGOInfo(**parsed_dict)
+    for batch in build_batches(pending):
+        run(batch)
+    return stats
 
 
 def main(ngo_name):
@@ -105,30 +240,77 @@ def main(ngo_name):
     return infos
 
 
-if __name__ == "__main__":
-    # Load NGO names from CSV
-    org_names = get_org_names()
-
-    # Initialize dictionaries to store results
-    websites = {}
-    addresses = {}
+def lookup_orgs(org_names, on_result, batched=BATCHED_EXTRACTION):
+    """
+    Search and extract every organization, reporting each one through
+    on_result(name, info, error). Stops early once the LLM budget is spent;
+    organizations not reported by then are left for the next run.
+    """
+    if batched:
+        items = []
+        for org_name in org_names:
+            try:
+                items.append((org_name, search_ngos_serpapi(org_name)))
+            except Exception as e:
+                on_result(org_name, None, e)
+        stats = {"requests": 0}
+        try:
+            extract_ngo_infos_batched(items, on_result, stats)
+        except BudgetExceeded as e:
+            print(f"Stopping: {e}")
+        print(f"{len(items)} organizations extracted in {stats['requests']} requests")
+        return
 
     # Process each NGO name
     for org_name in org_names:
         print(f"Processing: {org_name}")
         try:
-            info = main(org_name)
-            websites[org_name] = info["website"]
-            addresses[org_name] = info["address"]
+            snippets = search_ngos_serpapi(org_name)
+            info = extract_ngo_info_with_gpt(org_name, snippets)
+        except BudgetExceeded as e:
+            print(f"Stopping: {e}")
+            break
         except Exception as e:
-            print(f"Error processing {org_name}: {e}")
-            websites[org_name] = "Error"
-            addresses[org_name] = "Error"
+            on_result(org_name, None, e)
+            continue
+        on_result(org_name, info, None)
+
+
+if __name__ == "__main__":
+    # Load NGO names from CSV
+    org_names = get_org_names()
+
+    # Look up one representative per cluster of near-identical names
+    representative = cluster_names(org_names)
+    dedup_report(org_names, representative)
+
+    # Every finished lookup is journaled, so a rerun only does the remaining work
+    journal = RunJournal("../data/interim/unfpa_partners-v1.journal.jsonl")
+    todo = journal.pending(representative[name] for name in org_names)
+    print(f"{len(todo)} organizations to process ({len(org_names)} rows)")
+
+    def record(org_name, info, error):
+        if error is not None:
+            print(f"Error processing {org_name}: {error}")
+            journal.record(org_name, ERROR, error=str(error))
+        else:
+            info = info.model_dump()
+            journal.record(org_name, classify(info), result=info)
+
+    lookup_orgs(todo, record)
+    journal.close()
+    print(f"Run summary: {journal.summary()}")
 
     # Save results to CSV
     print("Saving results to CSV...")
 
     df = pd.read_csv("../data/unfpa_partners.csv")
-    df["URL"] = df["OrgName"].map(websites)
-    df["Address"] = df["OrgName"].map(addresses)
-    df.to_csv("../data/unfpa_partners-v1.csv", index=False)
+    # Broadcast each representative's result to every member of its cluster
+    lookup_name = df["OrgName"].map(representative)
+    df["URL"] = lookup_name.map(lambda name: journal.result(name, "website"))
+    df["Address"] = lookup_name.map(lambda name: journal.result(name, "address"))
+    df["LookupStatus"] = lookup_name.map(journal.status)
+    atomic_write_csv(df, "../data/unfpa_partners-v1.csv")
+    print_stats()
+    print_http_stats()
+    print_llm_usage()
@@ -1,12 +1,19 @@
 import os
+import json
+import asyncio
 import pandas as pd
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
 
 # import openai
 # import requests
 from pydantic import BaseModel
 from typing import Optional
+from dataCatalog import DATA_DIR
+from enrichEngine import run_enrichment
+from llmCache import get_cache, print_stats
+from llmMeter import BudgetExceeded, metered, print_stats as print_llm_usage
+from runJournal import RunJournal, ERROR, atomic_write_csv, classify
 
 # Load environment variables
 HOME_DIR = os.path.expanduser("~")
@@ -15,9 +22,15 @@ load_dotenv(f"{HOME_DIR}/.env")
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 SERPAPI_API_KEY = os.getenv("SERPAPI_API_KEY")
-DATADIR = os.path.join(
-    HOME_DIR, "Documents", "repos", "healthymomsaction", "unfpa-partners", "data"
-)
+DATADIR = DATA_DIR
+MODEL_NAME = "gpt-4o-2024-08-06"
+
+# Enrichment engine limits (match these to the account's rate limits)
+CONCURRENCY = 8
+REQUESTS_PER_MINUTE = 60
+TOKENS_PER_MINUTE = 150000
+# The web search tool injects results into the context on top of the prompt
+WEB_SEARCH_TOKENS = 3000
 
 
 def get_org_data():
@@ -35,7 +48,7 @@ class NGOInfo(BaseModel):
     description: Optional[str]
 
 
-def find_ngo_infos(ngo_name) -> NGOInfo:
+def build_model_input(ngo_name) -> list:
     prompt = f"""
     You are an information extraction assistant. 
     Given the NGO name and country (in the format: name, country), search the web and provide:
@@ -57,7 +70,7 @@ def find_ngo_infos(ngo_name) -> NGOInfo:
     Here is the NGO name: {ngo_name}
     """
 
-    model_input = [
+    return [
         {"role": "system", "content": "Extract the event information."},
         {
             "role": "user",
@@ -65,16 +78,78 @@ def find_ngo_infos(ngo_name) -> NGOInfo:
         },
     ]
 
-    client = OpenAI(api_key=OPENAI_API_KEY)
-    response = client.responses.parse(
-        model="gpt-4o-2024-08-06",
-        input=model_input,
-        tools=[{"type": "web_search_preview"}],
-        text_format=NGOInfo,
-        temperature=0,
+
+def estimate_tokens(ngo_name) -> int:
+    prompt = build_model_input(ngo_name)[1]["content"]
+    return len(prompt) // 4 + WEB_SEARCH_TOKENS
+
+
+def find_ngo_infos(ngo_name) -> NGOInfo:
+    model_input = build_model_input(ngo_name)
+
+    def compute():
+        client = metered(OpenAI(api_key=OPENAI_API_KEY), "getOrgInfosOnline")
+        response = client.responses.parse(
+            model=MODEL_NAME,
+            input=model_input,
+            tools=[{"type": "web_search_preview"}],
+            text_format=NGOInfo,
+            temperature=0,
+        )
+
+        return response.output_parsed
+
+    return get_cache().fetch(
+        ngo_name, json.dumps(model_input), MODEL_NAME, NGOInfo, compute
+    )
+
+
+async def find_ngo_infos_async(ngo_name, client: AsyncOpenAI) -> NGOInfo:
+    model_input = build_model_input(ngo_name)
+
+    async def compute():
+        response = await client.responses.parse(
+            model=MODEL_NAME,
+            input=model_input,
+            tools=[{"type": "web_search_preview"}],
+            text_format=NGOInfo,
+            temperature=0,
+        )
+
+        return response.output_parsed
+
+    return await get_cache().afetch(
+        ngo_name, json.dumps(model_input), MODEL_NAME, NGOInfo, compute
     )
 
-    return response.output_parsed
+
+async def enrich_ngos(
+    org_names,
+    concurrency=CONCURRENCY,
+    rpm=REQUESTS_PER_MINUTE,
+    tpm=TOKENS_PER_MINUTE,
+    on_result=None,
+    progress=None,
+):
+    """Look up every NGO concurrently; results come back in input order."""
+    # Retries are handled by the engine so they share the rate limiter
+    client = metered(
+        AsyncOpenAI(api_key=OPENAI_API_KEY, max_retries=0), "getOrgInfosOnline"
+    )
+    try:
+        return await run_enrichment(
+            org_names,
+            lambda name: find_ngo_infos_async(name, client),
+            concurrency=concurrency,
+            rpm=rpm,
+            tpm=tpm,
+            estimate_tokens=estimate_tokens,
+            on_result=on_result,
+            progress=progress,
+            stop_on=(BudgetExceeded,),
+        )
+    finally:
+        await client.close()
 
 
 def test(ngo_name):
@@ -88,36 +163,40 @@ if __name__ == "__main__":
 
     df = get_org_data()
     df = df[df.OrgType == "NGO"]
-    # Initialize dictionaries to store results
-    addresses = {}
-    cities = {}
-    websites = {}
-    descriptions = {}
-
-    # Process each NGO name
-    for name, country in tqdm(zip(df.OrgName, df.Country)):
-        org_name = f"{name}, {country}"
-        # print(f"Processing: {org_name}")
+    org_names = (df.OrgName + ", " + df.Country).to_list()
 
+    # Every finished lookup is journaled, so a rerun only does the remaining work
+    journal = RunJournal(
+        os.path.join(DATADIR, "interim", "unfpa_partners-ngos.journal.jsonl")
+    )
+    todo = journal.pending(org_names)
+
+    def record(result):
+        if result.ok:
+            info = result.value.model_dump()
+            journal.record(result.item, classify(info), result=info)
+        else:
+            print(f"Error processing {result.item}: {result.error}")
+            journal.record(result.item, ERROR, error=str(result.error))
+
+    # Process every NGO through the concurrent enrichment engine
+    with tqdm(total=len(todo)) as bar:
         try:
-            info = find_ngo_infos(org_name)
-
-            addresses[name] = info.address
-            cities[name] = info.city
-            websites[name] = info.website
-            descriptions[name] = info.description
-
-        except Exception as e:
-            print(f"Error processing {name}: {e}")
-            websites[name] = "Not found"
-            addresses[name] = "Not found"
-            cities[name] = "Not found"
-            descriptions[name] = "Not found"
+            asyncio.run(enrich_ngos(todo, on_result=record, progress=bar.update))
+        except BudgetExceeded as e:
+            # Unfinished NGOs are not journaled, so the next run picks them up
+            print(f"Stopping: {e}")
+    journal.close()
+    print(f"Run summary: {journal.summary()}")
 
     # Save results to CSV
     print("Saving results to CSV...")
-    df["Address"] = df["OrgName"].map(addresses)
-    df["City"] = df["OrgName"].map(cities)
-    df["URL"] = df["OrgName"].map(websites)
-    df["Description"] = df["OrgName"].map(descriptions)
-    df.to_csv(os.path.join(DATADIR, "unfpa_partners-ngos.csv"), index=False)
+    keys = pd.Series(org_names, index=df.index)
+    df["Address"] = keys.map(lambda key: journal.result(key, "address"))
+    df["City"] = keys.map(lambda key: journal.result(key, "city"))
+    df["URL"] = keys.map(lambda key: journal.result(key, "website"))
+    df["Description"] = keys.map(lambda key: journal.result(key, "description"))
+    df["LookupStatus"] = keys.map(journal.status)
+    atomic_write_csv(df, os.path.join(DATADIR, "unfpa_partners-ngos.csv"))
+    print_stats()
+    print_llm_usage()
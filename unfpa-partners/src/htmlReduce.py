@@ -0,0 +1,117 @@
+import re
+
+from bs4 import BeautifulSoup, Comment, Tag
+
+try:
+    import tiktoken
+
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception:  # tiktoken missing or its encoding file can't be fetched
+    _encoding = None
+
+# Nodes that never carry extractable content
+DROP_TAGS = [
+    "script",
+    "style",
+    "noscript",
+    "template",
+    "svg",
+    "canvas",
+    "iframe",
+    "video",
+    "audio",
+    "source",
+    "link",
+    "meta",
+    "head",
+]
+KEEP_ATTRIBUTES = {"href", "src", "alt", "title"}
+# Wrappers that only add markup once their attributes are gone
+UNWRAP_TAGS = ["span", "font", "b", "i", "strong", "em", "u", "small"]
+
+MAX_CHUNK_TOKENS = 12000
+
+
+def count_tokens(text: str) -> int:
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // 4
+
+
+def reduce_html(html: str) -> str:
+    """Strip scripts, styles, comments and presentational attributes from a page."""
+    soup = BeautifulSoup(html, "html.parser")
+    for node in soup.select(", ".join(DROP_TAGS)):
+        node.decompose()
+    for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
+        comment.extract()
+
+    for tag in soup.find_all(True):
+        tag.attrs = {
+            key: value for key, value in tag.attrs.items() if key in KEEP_ATTRIBUTES
+        }
+        # data: URIs are large and useless to the model
+        if tag.get("src", "").startswith("data:"):
+            del tag["src"]
+    for tag in soup.find_all(UNWRAP_TAGS):
+        tag.unwrap()
+
+    # Drop elements left without any text, link or image
+    for tag in reversed(soup.find_all(True)):
+        if tag.name in ("img", "a", "br"):
+            continue
+        if not tag.get_text(strip=True) and not tag.find(["img", "a"]):
+            tag.decompose()
+
+    body = soup.body or soup
+    text = body.decode_contents()
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _cut(text: str, max_tokens: int) -> list:
+    """Cut text by characters; pieces still over budget are halved again."""
+    if len(text) <= 1 or count_tokens(text) <= max_tokens:
+        return [text]
+    size = min(max_tokens * 3, (len(text) + 1) // 2)
+    pieces = []
+    for i in range(0, len(text), size):
+        pieces.extend(_cut(text[i : i + size], max_tokens))
+    return pieces
+
+
+def _blocks(node, max_tokens: int) -> list:
+    """Split a node into serialized blocks that each fit in `max_tokens`."""
+    markup = str(node)
+    if count_tokens(markup) <= max_tokens:
+        return [markup]
+    if isinstance(node, Tag) and node.contents:
+        blocks = []
+        for child in node.contents:
+            blocks.extend(_blocks(child, max_tokens))
+        return blocks
+    # An oversized text node or leaf element: cut it by characters
+    return _cut(markup, max_tokens)
+
+
+def chunk_html(reduced_html: str, max_tokens: int = MAX_CHUNK_TOKENS) -> list:
+    """
+    Pack the reduced page into chunks of roughly `max_tokens`, cutting only
+    between elements so a single listing card is never split across chunks.
+    """
+    soup = BeautifulSoup(reduced_html, "html.parser")
+    blocks = []
+    for node in soup.contents:
+        blocks.extend(_blocks(node, max_tokens))
+
+    chunks = []
+    current, current_tokens = [], 0
+    for block in blocks:
+        tokens = count_tokens(block)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append("".join(current))
+            current, current_tokens = [], 0
+        current.append(block)
+        current_tokens += tokens
+    if current:
+        chunks.append("".join(current))
+    return [chunk for chunk in chunks if chunk.strip()]
@@ -0,0 +1,345 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Optional
+from urllib.parse import urlencode
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DATA_DIR = "../data"
+CACHE_PATH = os.getenv(
+    "HTTP_CACHE_PATH", os.path.join(DATA_DIR, "interim", "http_cache.db")
+)
+# "on" reads and writes, "refresh" refetches and overwrites, "bypass" ignores the cache
+CACHE_MODE = os.getenv("HTTP_CACHE_MODE", "on")
+
+TIMEOUT = (5, 30)  # connect, read (seconds)
+POOL_SIZE = 16
+MAX_RETRIES = 4
+BACKOFF_FACTOR = 0.5
+RETRY_STATUS = (429, 500, 502, 503, 504)
+# Responses without ETag/Last-Modified are reused for this long
+DEFAULT_TTL = 24 * 3600
+USER_AGENT = "healthymomsaction-unfpa-partners/1.0"
+
+
+@dataclass
+class Response:
+    status_code: int
+    url: str
+    headers: dict
+    content: bytes
+    from_cache: bool = False
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} for {self.url}")
+
+
+def request_key(url: str, params: Optional[dict] = None) -> str:
+    query = urlencode(sorted((params or {}).items()), doseq=True)
+    return hashlib.sha256(f"GET {url}?{query}".encode("utf-8")).hexdigest()
+
+
+# === On-disk cache ===
+class HTTPCache:
+    """SQLite store of GET responses with their ETag/Last-Modified validators."""
+
+    def __init__(self, path: str = CACHE_PATH, mode: str = CACHE_MODE):
+        if mode not in ("on", "refresh", "bypass"):
+            raise ValueError(f"Unknown cache mode: {mode}")
+        self.mode = mode
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                stored_at REAL NOT NULL
+            )
+            """)
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[tuple]:
+        """(Response, stored_at) or None."""
+        if self.mode != "on":
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, status, headers, body, stored_at FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        url, status, headers, body, stored_at = row
+        response = Response(status, url, json.loads(headers), body, from_cache=True)
+        return response, stored_at
+
+    def put(self, key: str, response: Response):
+        if self.mode == "bypass":
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    response.url.split("?")[0],  # query strings may carry API keys
+                    response.status_code,
+                    json.dumps(response.headers),
+                    response.content,
+                    time.time(),
+                ),
+            )
+            self._conn.commit()
+
+    def touch(self, key: str):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET stored_at = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+
+def _validators(cached: Response) -> dict:
+    headers = {}
+    if "etag" in cached.headers:
+        headers["If-None-Match"] = cached.headers["etag"]
+    if "last-modified" in cached.headers:
+        headers["If-Modified-Since"] = cached.headers["last-modified"]
+    return headers
+
+
+def _is_fresh(cached: Response, stored_at: float, ttl: float) -> bool:
+    # Within the TTL no request is made; once stale, entries with validators
+    # are revalidated with a conditional request (see _before)
+    return time.time() - stored_at < ttl
+
+
+def _cacheable(status: int) -> bool:
+    return status == 200
+
+
+def _retry_after(headers) -> Optional[float]:
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+# === Clients ===
+class _CachedGet:
+    """Cache lookup and update shared by the sync and async clients."""
+
+    cache: Optional[HTTPCache] = None
+
+    def _before(self, url, params, headers, ttl):
+        """(key, cached entry, request headers, response if fresh)."""
+        key = request_key(url, params)
+        entry = self.cache.get(key)
+        if entry and _is_fresh(*entry, ttl):
+            self.cache.stats["hits"] += 1
+            return key, entry, headers, entry[0]
+        headers = dict(headers or {})
+        if entry:
+            headers.update(_validators(entry[0]))
+        return key, entry, headers, None
+
+    def _after(self, key, entry, response: Response) -> Response:
+        if response.status_code == 304 and entry:
+            self.cache.stats["revalidated"] += 1
+            self.cache.touch(key)
+            return entry[0]
+        self.cache.stats["misses"] += 1
+        if _cacheable(response.status_code):
+            self.cache.put(key, response)
+        return response
+
+
+class HTTPClient(_CachedGet):
+    """
+    requests.Session with keep-alive pooling, timeouts, retry with backoff on
+    connection errors and 429/5xx, and the on-disk cache in front of GETs.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[HTTPCache] = None,
+        timeout=TIMEOUT,
+        max_retries: int = MAX_RETRIES,
+        pool_size: int = POOL_SIZE,
+        headers: Optional[dict] = None,
+    ):
+        self.cache = cache
+        self.timeout = timeout
+        self.requests = 0
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        self.session.headers.update(headers or {})
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=BACKOFF_FACTOR,
+            backoff_jitter=BACKOFF_FACTOR,
+            status_forcelist=RETRY_STATUS,
+            allowed_methods=["GET", "HEAD"],
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _send(self, url, params, headers) -> Response:
+        self.requests += 1
+        r = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+        return Response(
+            r.status_code,
+            r.url,
+            {k.lower(): v for k, v in r.headers.items()},
+            r.content,
+        )
+
+    def get(
+        self,
+        url: str,
+        params: Optional[dict] = None,
+        headers: Optional[dict] = None,
+        ttl: float = DEFAULT_TTL,
+    ) -> Response:
+        if self.cache is None:
+            return self._send(url, params, headers)
+        key, entry, headers, fresh = self._before(url, params, headers, ttl)
+        if fresh is not None:
+            return fresh
+        return self._after(key, entry, self._send(url, params, headers))
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncHTTPClient(_CachedGet):
+    """httpx.AsyncClient counterpart of HTTPClient, sharing the same cache."""
+
+    def __init__(
+        self,
+        cache: Optional[HTTPCache] = None,
+        timeout=TIMEOUT,
+        max_retries: int = MAX_RETRIES,
+        pool_size: int = POOL_SIZE,
+        headers: Optional[dict] = None,
+    ):
+        self.cache = cache
+        self.max_retries = max_retries
+        self.requests = 0
+        connect, read = timeout
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read, connect=connect),
+            limits=httpx.Limits(
+                max_connections=pool_size, max_keepalive_connections=pool_size
+            ),
+            headers={"User-Agent": USER_AGENT, **(headers or {})},
+            transport=httpx.AsyncHTTPTransport(retries=max_retries),  # connect errors
+            follow_redirects=True,
+        )
+
+    async def _send(self, url, params, headers) -> Response:
+        for attempt in range(self.max_retries + 1):
+            self.requests += 1
+            try:
+                r = await self.client.get(url, params=params, headers=headers)
+            except (httpx.ReadTimeout, httpx.RemoteProtocolError):
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(random.uniform(0, BACKOFF_FACTOR * 2**attempt))
+                continue
+            if r.status_code not in RETRY_STATUS or attempt == self.max_retries:
+                break
+            delay = _retry_after(r.headers)
+            if delay is None:
+                delay = random.uniform(0, BACKOFF_FACTOR * 2**attempt)
+            await asyncio.sleep(delay)
+        return Response(
+            r.status_code,
+            str(r.url),
+            {k.lower(): v for k, v in r.headers.items()},
+            r.content,
+        )
+
+    async def get(
+        self,
+        url: str,
+        params: Optional[dict] = None,
+        headers: Optional[dict] = None,
+        ttl: float = DEFAULT_TTL,
+    ) -> Response:
+        if self.cache is None:
+            return await self._send(url, params, headers)
+        key, entry, headers, fresh = self._before(url, params, headers, ttl)
+        if fresh is not None:
+            return fresh
+        return self._after(key, entry, await self._send(url, params, headers))
+
+    async def close(self):
+        await self.client.aclose()
+
+
+_cache: Optional[HTTPCache] = None
+_client: Optional[HTTPClient] = None
+
+
+def get_cache() -> HTTPCache:
+    global _cache
+    if _cache is None:
+        _cache = HTTPCache()
+    return _cache
+
+
+def get_client() -> HTTPClient:
+    """Process-wide pooled, cached client."""
+    global _client
+    if _client is None:
+        _client = HTTPClient(cache=get_cache())
+    return _client
+
+
+def print_stats():
+    stats = get_cache().stats
+    print(
+        f"HTTP cache: {stats['hits']} hits, {stats['revalidated']} revalidated, "
+        f"{stats['misses']} misses"
+    )
@@ -0,0 +1,131 @@
+import hashlib
+import io
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageOps
+
+PREP_DIR = "../data/interim/prep"
+
+# Preprocessing settings (part of the cache key)
+MARGIN_THRESHOLD = 24  # darkness (0-255) that counts as page content
+MAX_WIDTH = 1024  # two 512px vision tiles wide
+MIN_SCALE = 0.75  # keeps ~11px table text above ~8px
+GRAY_LEVELS = 16
+SETTINGS = {
+    "margin_threshold": MARGIN_THRESHOLD,
+    "max_width": MAX_WIDTH,
+    "min_scale": MIN_SCALE,
+    "gray_levels": GRAY_LEVELS,
+}
+
+
+def estimate_vision_tokens(width: int, height: int) -> int:
+    """Token cost of a high-detail image input for the gpt-4o family."""
+    # Fit within 2048x2048, then scale the shortest side down to 768
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    tiles = math.ceil(width / 512) * math.ceil(height / 512)
+    return 85 + 170 * tiles
+
+
+def crop_margins(image: Image.Image, threshold=MARGIN_THRESHOLD) -> Image.Image:
+    # Anything darker than the threshold is content; crop to its bounding box
+    mask = ImageOps.invert(image).point(lambda v: 255 if v > threshold else 0)
+    bbox = mask.getbbox()
+    return image.crop(bbox) if bbox else image
+
+
+def preprocess_image(image_bytes: bytes) -> bytes:
+    image = Image.open(io.BytesIO(image_bytes))
+    if image.mode in ("RGBA", "LA", "P"):
+        # Flatten transparency onto white before dropping colour
+        background = Image.new("RGBA", image.size, "white")
+        image = Image.alpha_composite(background, image.convert("RGBA"))
+    image = image.convert("L")
+    image = crop_margins(image)
+
+    scale = max(MIN_SCALE, min(1.0, MAX_WIDTH / image.width))
+    if scale < 1.0:
+        size = (round(image.width * scale), round(image.height * scale))
+        image = image.resize(size, Image.LANCZOS)
+
+    image = image.quantize(GRAY_LEVELS)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def _cache_path(source_bytes: bytes) -> str:
+    digest = hashlib.sha256(source_bytes)
+    digest.update(json.dumps(SETTINGS, sort_keys=True).encode("utf-8"))
+    return os.path.join(PREP_DIR, f"{digest.hexdigest()}.png")
+
+
+def _image_report(source_bytes: bytes, prepared_bytes: bytes) -> dict:
+    before = Image.open(io.BytesIO(source_bytes))
+    after = Image.open(io.BytesIO(prepared_bytes))
+    return {
+        "bytes_before": len(source_bytes),
+        "bytes_after": len(prepared_bytes),
+        "tokens_before": estimate_vision_tokens(*before.size),
+        "tokens_after": estimate_vision_tokens(*after.size),
+    }
+
+
+def prepare_image(image_path: str) -> tuple:
+    """Return (prepared PNG bytes, report), reusing the cached copy when present."""
+    with open(image_path, "rb") as f:
+        source_bytes = f.read()
+    cache_path = _cache_path(source_bytes)
+    cached = os.path.exists(cache_path)
+    if cached:
+        with open(cache_path, "rb") as f:
+            prepared_bytes = f.read()
+    else:
+        prepared_bytes = preprocess_image(source_bytes)
+        os.makedirs(PREP_DIR, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(prepared_bytes)
+        os.replace(tmp_path, cache_path)
+
+    report = _image_report(source_bytes, prepared_bytes)
+    report.update({"image": os.path.basename(image_path), "cached": cached})
+    return prepared_bytes, report
+
+
+def _prepare_for_pool(image_path):
+    return prepare_image(image_path)[1]
+
+
+def prepare_pages(image_paths, workers=None) -> list:
+    """Preprocess every page across a process pool; returns one report per page."""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        reports = list(pool.map(_prepare_for_pool, image_paths))
+    print_report(reports)
+    return reports
+
+
+def print_report(reports):
+    for r in reports:
+        print(
+            f"{r['image']}: {r['bytes_before'] / 1024:.0f} KB -> "
+            f"{r['bytes_after'] / 1024:.0f} KB, "
+            f"~{r['tokens_before']} -> ~{r['tokens_after']} tokens"
+            f"{' (cached)' if r['cached'] else ''}"
+        )
+    bytes_saved = sum(r["bytes_before"] - r["bytes_after"] for r in reports)
+    tokens_saved = sum(r["tokens_before"] - r["tokens_after"] for r in reports)
+    print(
+        f"Saved {bytes_saved / 1024:.0f} KB upload and ~{tokens_saved} "
+        f"vision tokens across {len(reports)} pages"
+    )
+
+
+if __name__ == "__main__":
+    prepare_pages([f"../data/unfpa_partners/p{i}.png" for i in range(1, 46)])
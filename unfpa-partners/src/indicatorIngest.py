@@ -0,0 +1,272 @@
+import glob
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from countries import country_table, to_slug
+from dataCatalog import DATA_DIR
+
+RAW_DIR = os.path.join(DATA_DIR, "raw")
+OUT_DIR = os.path.join(DATA_DIR, "processed", "indicators")
+# Rows per chunk; memory use scales with this, not with the file size
+CHUNK_ROWS = 50_000
+
+_TEXT = pa.dictionary(pa.int32(), pa.string())
+SCHEMA = pa.schema(
+    [
+        ("Indicator", _TEXT),
+        ("Indicator_Code", _TEXT),
+        ("Country", _TEXT),
+        ("Country_Name", _TEXT),
+        ("Year", pa.int16()),
+        ("Source", _TEXT),
+        ("Dimension", _TEXT),
+        ("Value", pa.float64()),
+        ("Low", pa.float64()),
+        ("High", pa.float64()),
+    ]
+)
+TEXT_COLUMNS = [f.name for f in SCHEMA if f.type == _TEXT]
+
+
+# === Dump layouts ===
+@dataclass
+class DumpFormat:
+    """Where each output column lives in one kind of export."""
+
+    name: str
+    indicator: str
+    country_name: str
+    year: str
+    # value column -> Dimension label, for exports with one column per breakdown
+    values: dict
+    indicator_code: Optional[str] = None
+    iso3: Optional[str] = None
+    source: Optional[str] = None
+    dimension: Optional[str] = None
+    low: Optional[str] = None
+    high: Optional[str] = None
+    # column -> required value, e.g. country rows only
+    row_filters: dict = field(default_factory=dict)
+
+    @property
+    def text_columns(self) -> list:
+        columns = [self.indicator, self.indicator_code, self.country_name]
+        columns += [self.iso3, self.source, self.dimension, *self.row_filters]
+        return [c for c in columns if c]
+
+    @property
+    def usecols(self) -> list:
+        numbers = [*self.values, self.year, self.low, self.high]
+        return self.text_columns + [c for c in numbers if c]
+
+
+UNFPA = DumpFormat(
+    "unfpa",
+    indicator="Indicator Name",
+    country_name="Country",
+    year="Survey Year",
+    source="Source Organization",
+    values={"Total": "Total", "Sex: Male": "Male", "Sex: Female": "Female"},
+)
+
+WHO = DumpFormat(
+    "who",
+    indicator="Indicator",
+    indicator_code="IndicatorCode",
+    country_name="Location",
+    iso3="SpatialDimValueCode",
+    year="Period",
+    dimension="Dim1",
+    values={"FactValueNumeric": None},
+    low="FactValueNumericLow",
+    high="FactValueNumericHigh",
+    row_filters={"Location type": "Country"},
+)
+
+FORMATS = [WHO, UNFPA]
+
+
+def detect_format(path) -> DumpFormat:
+    header = set(pd.read_csv(path, nrows=0).columns)
+    for fmt in FORMATS:
+        if {fmt.indicator, fmt.country_name, fmt.year} <= header:
+            return fmt
+    raise ValueError(f"Unrecognized indicator export: {path}")
+
+
+# === Chunk processing ===
+def _slugs(fmt: DumpFormat, chunk: pd.DataFrame) -> pd.Series:
+    """Country slug per row; resolved once per distinct value, not per row."""
+    if fmt.iso3:
+        by_iso3 = dict(zip(country_table().ISO3, country_table().index))
+        return chunk[fmt.iso3].map(by_iso3)
+    names = chunk[fmt.country_name]
+    lookup = dict(zip(names.cat.categories, to_slug(names.cat.categories.to_series())))
+    return names.map(lookup)
+
+
+def _filter(fmt, chunk, indicators, slugs) -> pd.DataFrame:
+    """Indicator, row and country filters, applied before anything is reshaped."""
+    mask = pd.Series(True, index=chunk.index)
+    for column, value in fmt.row_filters.items():
+        mask &= chunk[column] == value
+    if indicators is not None:
+        wanted = chunk[fmt.indicator].isin(indicators)
+        if fmt.indicator_code:
+            wanted |= chunk[fmt.indicator_code].isin(indicators)
+        mask &= wanted
+    chunk = chunk[mask]
+    country = _slugs(fmt, chunk)
+    if slugs is not None:
+        keep = country.isin(slugs)
+        chunk, country = chunk[keep], country[keep]
+    return chunk.assign(_country=country)
+
+
+def _long(fmt, chunk, value_columns) -> pd.DataFrame:
+    """One row per (indicator, country, year, source, dimension) in SCHEMA order."""
+    frames = []
+    for column in value_columns:
+
+        def optional(name):
+            return chunk[name] if name else None
+
+        frame = pd.DataFrame(
+            {
+                "Indicator": chunk[fmt.indicator],
+                "Indicator_Code": optional(fmt.indicator_code),
+                "Country": chunk["_country"],
+                "Country_Name": chunk[fmt.country_name],
+                "Year": chunk[fmt.year],
+                "Source": optional(fmt.source),
+                "Dimension": (
+                    chunk[fmt.dimension] if fmt.dimension else fmt.values[column]
+                ),
+                "Value": chunk[column],
+                "Low": optional(fmt.low),
+                "High": optional(fmt.high),
+            },
+            index=chunk.index,
+        )
+        frames.append(frame.dropna(subset=["Value"]))
+    df = pd.concat(frames, ignore_index=True)
+    for column in TEXT_COLUMNS:
+        df[column] = df[column].astype("string").astype("category")
+    return df
+
+
+def ingest(
+    path,
+    out_path=None,
+    indicators=None,
+    countries=None,
+    chunk_rows=CHUNK_ROWS,
+) -> dict:
+    """
+    Stream one export into a long, dictionary-encoded Parquet file. Only the
+    needed columns are parsed, text columns are read as categoricals, and
+    indicator/country filters drop rows chunk by chunk. Indicators match
+    either names or codes; countries accept any spelling.
+    """
+    fmt = detect_format(path)
+    out_path = out_path or os.path.join(
+        OUT_DIR, f"{os.path.splitext(os.path.basename(path))[0]}.parquet"
+    )
+    header = set(pd.read_csv(path, nrows=0).columns)
+    usecols = [c for c in fmt.usecols if c in header]
+    value_columns = [c for c in fmt.values if c in header]
+    slugs = None
+    if countries is not None:
+        slugs = set(to_slug(pd.Series(list(countries))).dropna())
+    indicators = list(indicators) if indicators is not None else None
+
+    stats = {"format": fmt.name, "rows_read": 0, "rows_written": 0, "chunks": 0}
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    chunks = pd.read_csv(
+        path,
+        usecols=usecols,
+        dtype={c: "category" for c in fmt.text_columns if c in header},
+        chunksize=chunk_rows,
+    )
+    with pq.ParquetWriter(f"{out_path}.tmp", SCHEMA) as writer:
+        for chunk in chunks:
+            stats["chunks"] += 1
+            stats["rows_read"] += len(chunk)
+            chunk = _filter(fmt, chunk, indicators, slugs)
+            if chunk.empty:
+                continue
+            df = _long(fmt, chunk, value_columns)
+            writer.write_table(
+                pa.Table.from_pandas(df, schema=SCHEMA, preserve_index=False)
+            )
+            stats["rows_written"] += len(df)
+    os.replace(f"{out_path}.tmp", out_path)
+    stats["path"] = out_path
+    return stats
+
+
+def ingest_all(raw_dir=RAW_DIR, **options) -> list:
+    return [
+        ingest(path, **options)
+        for path in sorted(glob.glob(os.path.join(raw_dir, "*.csv")))
+    ]
+
+
+# === Loaders ===
+def load_indicators(
+    name, indicators=None, countries=None, years=None, columns=None
+) -> pd.DataFrame:
+    """
+    Read an ingested export, e.g. load_indicators("who-maternal-deaths").
+    Filters are pushed down to the Parquet reader.
+    """
+    filters = []
+    if indicators is not None:
+        indicators = list(indicators)
+        # Names and codes: one OR-group per column
+        filters = [
+            [("Indicator", "in", indicators)],
+            [("Indicator_Code", "in", indicators)],
+        ]
+    extra = []
+    path = os.path.join(OUT_DIR, f"{name}.parquet")
+    if countries is not None:
+        slugs = to_slug(pd.Series(list(countries))).dropna().unique().tolist()
+        if not slugs:
+            # Nothing resolves: an empty frame with the file's columns
+            empty = pq.read_schema(path).empty_table().to_pandas()
+            return empty if columns is None else empty[columns]
+        extra.append(("Country", "in", slugs))
+    if years is not None:
+        extra.append(("Year", "in", [int(y) for y in years]))
+    filters = [group + extra for group in filters] or ([extra] if extra else None)
+    return pd.read_parquet(path, columns=columns, filters=filters)
+
+
+if __name__ == "__main__":
+    # indicatorIngest.py [export.csv ...] [--chunk-rows N]
+    args = sys.argv[1:]
+    chunk_rows = CHUNK_ROWS
+    if "--chunk-rows" in args:
+        chunk_rows = int(args.pop(args.index("--chunk-rows") + 1))
+        args.remove("--chunk-rows")
+    paths = args or sorted(glob.glob(os.path.join(RAW_DIR, "*.csv")))
+    for path in paths:
+        tracemalloc.start()
+        start = time.perf_counter()
+        stats = ingest(path, chunk_rows=chunk_rows)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(
+            f"{os.path.basename(path)} ({stats['format']}): {stats['rows_read']} rows "
+            f"-> {stats['rows_written']} in {stats['chunks']} chunks, "
+            f"{time.perf_counter() - start:.1f}s, peak {peak / 2**20:.1f} MB"
+        )
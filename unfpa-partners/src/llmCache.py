@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Awaitable, Callable, Optional, Type, Union
+
+from pydantic import BaseModel
+
+DATA_DIR = "../data"
+CACHE_PATH = os.getenv(
+    "LLM_CACHE_PATH", os.path.join(DATA_DIR, "interim", "llm_cache.db")
+)
+# "on" reads and writes, "refresh" recomputes and overwrites, "bypass" ignores the cache
+CACHE_MODE = os.getenv("LLM_CACHE_MODE", "on")
+MAX_BYTES = 512 * 1024 * 1024
+MAX_AGE_DAYS = 90
+
+
+def _as_bytes(data: Union[bytes, str]) -> bytes:
+    return data if isinstance(data, bytes) else data.encode("utf-8")
+
+
+def make_key(
+    input_data: Union[bytes, str], prompt: str, model: str, schema: Type[BaseModel]
+) -> str:
+    schema_text = json.dumps(schema.model_json_schema(), sort_keys=True)
+    digest = hashlib.sha256()
+    for part in (
+        _as_bytes(input_data),
+        _as_bytes(prompt),
+        _as_bytes(model),
+        _as_bytes(schema_text),
+    ):
+        # Length-prefix each part so neighbouring parts can't run together
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class LLMCache:
+    """
+    Content-addressed store for structured LLM responses, keyed by the input
+    bytes, prompt text, model name and Pydantic schema of the call.
+    """
+
+    def __init__(
+        self,
+        path: str = CACHE_PATH,
+        max_bytes: int = MAX_BYTES,
+        max_age_days: float = MAX_AGE_DAYS,
+        mode: str = CACHE_MODE,
+    ):
+        if mode not in ("on", "refresh", "bypass"):
+            raise ValueError(f"Unknown cache mode: {mode}")
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 24 * 3600
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    # --- raw access ---
+    def get(self, key: str) -> Optional[str]:
+        if self.mode != "on":
+            self.misses += 1
+            return None
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.max_age:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+        self.hits += 1
+        return row[0]
+
+    def put(self, key: str, value: str, model: str = ""):
+        if self.mode == "bypass":
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, value, len(value.encode("utf-8")), now, now),
+            )
+            self._conn.commit()
+        self.evict()
+
+    def evict(self):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ?",
+                (time.time() - self.max_age,),
+            )
+            total = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()[0]
+            if total > self.max_bytes:
+                # Drop least recently used entries until we fit again
+                excess = total - self.max_bytes
+                rows = self._conn.execute(
+                    "SELECT key, size FROM responses ORDER BY accessed_at"
+                )
+                victims = []
+                for key, size in rows:
+                    victims.append((key,))
+                    excess -= size
+                    if excess <= 0:
+                        break
+                self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    # --- structured helpers ---
+    def fetch(
+        self,
+        input_data: Union[bytes, str],
+        prompt: str,
+        model: str,
+        schema: Type[BaseModel],
+        compute: Callable[[], BaseModel],
+    ) -> BaseModel:
+        """Return the cached response for this call, computing it on a miss."""
+        key = make_key(input_data, prompt, model, schema)
+        cached = self.get(key)
+        if cached is not None:
+            return schema.model_validate_json(cached)
+        result = compute()
+        if result is not None:
+            self.put(key, result.model_dump_json(), model)
+        return result
+
+    async def afetch(
+        self,
+        input_data: Union[bytes, str],
+        prompt: str,
+        model: str,
+        schema: Type[BaseModel],
+        compute: Callable[[], Awaitable[BaseModel]],
+    ) -> BaseModel:
+        key = make_key(input_data, prompt, model, schema)
+        cached = self.get(key)
+        if cached is not None:
+            return schema.model_validate_json(cached)
+        result = await compute()
+        if result is not None:
+            self.put(key, result.model_dump_json(), model)
+        return result
+
+
+_cache = None
+
+
+def get_cache() -> LLMCache:
+    global _cache
+    if _cache is None:
+        _cache = LLMCache()
+    return _cache
+
+
+def print_stats():
+    stats = get_cache().stats()
+    print(
+        f"LLM cache: {stats['hits']} hits, {stats['misses']} misses, "
+        f"{stats['entries']} entries ({stats['bytes'] / 1024:.0f} KB)"
+    )
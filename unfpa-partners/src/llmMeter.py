@@ -0,0 +1,317 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+METER_PATH = os.getenv(
+    "LLM_METER_PATH", os.path.join(DATA_DIR, "interim", "llm_usage.jsonl")
+)
+
+# USD per 1M tokens: (input, cached input, output). Dated snapshots such as
+# "gpt-4o-2024-08-06" are priced by their longest matching prefix.
+PRICES = {
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "computer-use-preview": (3.00, 3.00, 12.00),
+}
+
+# Client namespaces walked through, and the calls that get metered
+NAMESPACES = {"beta", "chat", "completions", "responses"}
+METERED_CALLS = {"create", "parse"}
+
+
+class BudgetExceeded(RuntimeError):
+    pass
+
+
+@dataclass
+class Budget:
+    """Hard caps for a run; None means unlimited."""
+
+    max_tokens: Optional[int] = None
+    max_cost: Optional[float] = None
+    tokens_per_minute: Optional[int] = None
+
+    @classmethod
+    def from_env(cls) -> "Budget":
+        def read(name, cast):
+            value = os.getenv(name)
+            return cast(value) if value else None
+
+        return cls(
+            max_tokens=read("LLM_BUDGET_TOKENS", int),
+            max_cost=read("LLM_BUDGET_USD", float),
+            tokens_per_minute=read("LLM_TOKENS_PER_MINUTE", int),
+        )
+
+
+def price(model: str) -> tuple:
+    matches = [name for name in PRICES if model.startswith(name)]
+    return PRICES[max(matches, key=len)] if matches else (0.0, 0.0, 0.0)
+
+
+def usage_tokens(usage) -> tuple:
+    """(prompt, completion, cached) from Chat Completions or Responses usage."""
+    if usage is None:
+        return 0, 0, 0
+    prompt = getattr(usage, "prompt_tokens", None)
+    if prompt is None:
+        prompt = getattr(usage, "input_tokens", 0)
+    completion = getattr(usage, "completion_tokens", None)
+    if completion is None:
+        completion = getattr(usage, "output_tokens", 0)
+    details = getattr(usage, "prompt_tokens_details", None) or getattr(
+        usage, "input_tokens_details", None
+    )
+    cached = getattr(details, "cached_tokens", 0) or 0
+    return prompt or 0, completion or 0, cached
+
+
+def call_cost(model: str, prompt: int, completion: int, cached: int) -> float:
+    input_price, cached_price, output_price = price(model)
+    return (
+        (prompt - cached) * input_price
+        + cached * cached_price
+        + completion * output_price
+    ) / 1_000_000
+
+
+def percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+# === Meter ===
+class LLMMeter:
+    """
+    Records every model call (tokens, cost, latency) to a JSONL sink and
+    enforces the budget: calls are throttled to the tokens-per-minute cap and
+    refused once the next call would likely exceed the token or cost cap.
+    """
+
+    def __init__(self, sink_path: Optional[str] = METER_PATH, budget=None):
+        self.budget = budget or Budget()
+        self.run_id = uuid.uuid4().hex[:12]
+        self.records = []
+        self.tokens = 0
+        self.cost = 0.0
+        self.in_flight = 0
+        self._window = deque()  # (timestamp, tokens)
+        self._lock = threading.Lock()
+        self._sink = None
+        if sink_path:
+            os.makedirs(os.path.dirname(sink_path) or ".", exist_ok=True)
+            self._sink = open(sink_path, "a", encoding="utf-8")
+
+    def _projected(self) -> tuple:
+        """Tokens and cost once in-flight calls finish, at the average call size."""
+        done = sum(1 for r in self.records if r["error"] is None) or 1
+        pending = self.in_flight + 1
+        return (
+            self.tokens + pending * self.tokens / done,
+            self.cost + pending * self.cost / done,
+        )
+
+    def _wait_time(self) -> float:
+        tpm = self.budget.tokens_per_minute
+        now = time.monotonic()
+        while self._window and now - self._window[0][0] >= 60:
+            self._window.popleft()
+        if not tpm or sum(t for _, t in self._window) < tpm:
+            return 0.0
+        return 60 - (now - self._window[0][0])
+
+    def _admit(self) -> float:
+        """Seconds to wait before sending, or BudgetExceeded if it may not be sent."""
+        with self._lock:
+            tokens, cost = self._projected()
+            if self.budget.max_tokens and tokens > self.budget.max_tokens:
+                raise BudgetExceeded(
+                    f"Token budget {self.budget.max_tokens} reached ({self.tokens} used)"
+                )
+            if self.budget.max_cost and cost > self.budget.max_cost:
+                raise BudgetExceeded(
+                    f"Cost budget ${self.budget.max_cost:.2f} reached "
+                    f"(${self.cost:.4f} spent)"
+                )
+            wait = self._wait_time()
+            if wait <= 0:
+                self.in_flight += 1
+            return wait
+
+    def acquire(self):
+        while (wait := self._admit()) > 0:
+            time.sleep(wait)
+
+    async def aacquire(self):
+        while (wait := self._admit()) > 0:
+            await asyncio.sleep(wait)
+
+    def record(self, label, model, response=None, latency=0.0, error=None):
+        prompt, completion, cached = usage_tokens(getattr(response, "usage", None))
+        model = getattr(response, "model", None) or model or ""
+        record = {
+            "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "run_id": self.run_id,
+            "label": label,
+            "model": model,
+            "prompt_tokens": prompt,
+            "completion_tokens": completion,
+            "cached_tokens": cached,
+            "cost": round(call_cost(model, prompt, completion, cached), 6),
+            "latency": round(latency, 3),
+            "error": type(error).__name__ if error is not None else None,
+        }
+        with self._lock:
+            self.in_flight -= 1
+            self.records.append(record)
+            self.tokens += prompt + completion
+            self.cost += record["cost"]
+            self._window.append((time.monotonic(), prompt + completion))
+            if self._sink:
+                self._sink.write(json.dumps(record) + "\n")
+                self._sink.flush()
+        return record
+
+    def summary(self) -> list:
+        """One row per (label, model)."""
+        groups = {}
+        for r in self.records:
+            groups.setdefault((r["label"], r["model"]), []).append(r)
+        rows = []
+        for (label, model), records in sorted(groups.items()):
+            latencies = [r["latency"] for r in records]
+            rows.append(
+                {
+                    "label": label,
+                    "model": model,
+                    "calls": len(records),
+                    "errors": sum(r["error"] is not None for r in records),
+                    "prompt_tokens": sum(r["prompt_tokens"] for r in records),
+                    "cached_tokens": sum(r["cached_tokens"] for r in records),
+                    "completion_tokens": sum(r["completion_tokens"] for r in records),
+                    "cost": round(sum(r["cost"] for r in records), 4),
+                    "p50_s": percentile(latencies, 0.5),
+                    "p95_s": percentile(latencies, 0.95),
+                }
+            )
+        return rows
+
+    def print_summary(self):
+        rows = self.summary()
+        if not rows:
+            print("LLM usage: no model calls")
+            return
+        columns = list(rows[0])
+        widths = [max(len(c), *(len(str(r[c])) for r in rows)) for c in columns]
+        print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+        for r in rows:
+            print("  ".join(str(r[c]).ljust(w) for c, w in zip(columns, widths)))
+        print(
+            f"LLM usage: {len(self.records)} calls, {self.tokens} tokens, "
+            f"${self.cost:.4f}"
+        )
+
+    def close(self):
+        if self._sink:
+            self._sink.close()
+            self._sink = None
+
+
+# === Client wrapper ===
+class MeteredClient:
+    """
+    Wraps an OpenAI or AsyncOpenAI client; chat.completions, beta.chat.completions
+    and responses create/parse calls go through the meter, everything else
+    passes straight through.
+    """
+
+    def __init__(self, target, meter: LLMMeter, label: str, is_async=None):
+        self._target = target
+        self._meter = meter
+        self._label = label
+        if is_async is None:
+            is_async = type(target).__name__.startswith("Async")
+        self._async = is_async
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name in NAMESPACES:
+            return MeteredClient(attr, self._meter, self._label, self._async)
+        if name in METERED_CALLS and callable(attr):
+            return self._ameter(attr) if self._async else self._meter_call(attr)
+        return attr
+
+    def _meter_call(self, fn):
+        def call(*args, **kwargs):
+            self._meter.acquire()
+            start = time.perf_counter()
+            try:
+                response = fn(*args, **kwargs)
+            except Exception as e:
+                self._meter.record(
+                    self._label,
+                    kwargs.get("model"),
+                    None,
+                    time.perf_counter() - start,
+                    e,
+                )
+                raise
+            self._meter.record(
+                self._label, kwargs.get("model"), response, time.perf_counter() - start
+            )
+            return response
+
+        return call
+
+    def _ameter(self, fn):
+        async def call(*args, **kwargs):
+            await self._meter.aacquire()
+            start = time.perf_counter()
+            try:
+                response = await fn(*args, **kwargs)
+            except Exception as e:
+                self._meter.record(
+                    self._label,
+                    kwargs.get("model"),
+                    None,
+                    time.perf_counter() - start,
+                    e,
+                )
+                raise
+            self._meter.record(
+                self._label, kwargs.get("model"), response, time.perf_counter() - start
+            )
+            return response
+
+        return call
+
+
+_meter: Optional[LLMMeter] = None
+
+
+def get_meter() -> LLMMeter:
+    """Process-wide meter; budgets come from LLM_BUDGET_TOKENS/_USD and LLM_TOKENS_PER_MINUTE."""
+    global _meter
+    if _meter is None:
+        _meter = LLMMeter(budget=Budget.from_env())
+    return _meter
+
+
+def metered(client, label: str) -> MeteredClient:
+    return MeteredClient(client, get_meter(), label)
+
+
+def print_stats():
+    get_meter().print_summary()
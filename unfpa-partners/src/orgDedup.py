@@ -0,0 +1,133 @@
+import re
+import sys
+import unicodedata
+from collections import Counter, defaultdict
+
+import pandas as pd
+
+# Trigram Jaccard needed to merge two normalized names. Kept high, and names
+# must have the same number of words, because "ActionAid" and
+# "ActionAid Bangladesh" are different offices.
+SIMILARITY = 0.9
+# Trigrams shared by more names than this are too common to block on
+MAX_BLOCK_SIZE = 50
+
+ACRONYM_PARENS = re.compile(r"\(\s*[A-Z][A-Z0-9&.\-]{1,11}\s*\)")
+ACRONYM_SUFFIX = re.compile(r"\s+[-–]\s*[A-Z][A-Z0-9&]{2,10}\s*$")
+
+
+def normalize_org_name(name: str) -> str:
+    """
+    "World Food Programme (WFP)", "world food programme" and
+    "World Food Programme - WFP" all become "world food programme".
+    """
+    name = ACRONYM_PARENS.sub(" ", str(name))
+    name = ACRONYM_SUFFIX.sub("", name)
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(c for c in name if not unicodedata.combining(c))
+    name = name.casefold().replace("&", " and ").replace("’", "'").replace("'", "")
+    words = re.sub(r"[^\w]+", " ", name).split()
+    if words and words[0] == "the":
+        words = words[1:]
+    return " ".join(words)
+
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class UnionFind:
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i, j):
+        i, j = self.find(i), self.find(j)
+        if i != j:
+            self.parent[max(i, j)] = min(i, j)
+
+
+def cluster_names(names, threshold: float = SIMILARITY) -> dict:
+    """
+    Map every name to its cluster representative. Names with the same
+    normalized form always share a cluster; near-duplicates with as many
+    words are merged when their trigram Jaccard reaches `threshold`. Only
+    pairs sharing a rare trigram are compared, so this stays far from all-pairs.
+    """
+    counts = Counter(names)
+    keys = sorted({normalize_org_name(name) for name in counts})
+    grams = [trigrams(key) for key in keys]
+    lengths = [len(key.split()) for key in keys]
+
+    index = defaultdict(list)
+    for i, gram_set in enumerate(grams):
+        for gram in gram_set:
+            index[gram].append(i)
+
+    uf = UnionFind(len(keys))
+    for i, gram_set in enumerate(grams):
+        blocking = [g for g in gram_set if len(index[g]) <= MAX_BLOCK_SIZE]
+        candidates = set()
+        for gram in blocking or gram_set:
+            candidates.update(j for j in index[gram] if j > i)
+        for j in candidates:
+            if lengths[i] != lengths[j]:
+                continue
+            if jaccard(gram_set, grams[j]) >= threshold:
+                uf.union(i, j)
+
+    key_cluster = {key: uf.find(i) for i, key in enumerate(keys)}
+    members = defaultdict(list)
+    for name in counts:
+        members[key_cluster[normalize_org_name(name)]].append(name)
+
+    # The most frequent spelling represents its cluster
+    mapping = {}
+    for cluster in members.values():
+        representative = min(cluster, key=lambda n: (-counts[n], len(n), n))
+        for name in cluster:
+            mapping[name] = representative
+    return mapping
+
+
+def dedup_report(names, mapping: dict) -> dict:
+    """Lookups needed per row, per exact name and per cluster."""
+    names = list(names)
+    stats = {
+        "rows": len(names),
+        "unique_names": len(set(names)),
+        "clusters": len(set(mapping.values())),
+    }
+    stats["avoided_vs_rows"] = stats["rows"] - stats["clusters"]
+    stats["avoided_vs_unique"] = stats["unique_names"] - stats["clusters"]
+    print(
+        f"{stats['rows']} rows, {stats['unique_names']} distinct names, "
+        f"{stats['clusters']} clusters: {stats['avoided_vs_rows']} lookups avoided "
+        f"({stats['avoided_vs_unique']} beyond exact-name dedup)"
+    )
+    return stats
+
+
+def clusters_frame(mapping: dict) -> pd.DataFrame:
+    """Multi-member clusters, for eyeballing what got merged."""
+    df = pd.DataFrame(list(mapping.items()), columns=["OrgName", "Representative"])
+    sizes = df.groupby("Representative").OrgName.transform("size")
+    return df[sizes > 1].sort_values(["Representative", "OrgName"])
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else "../data/unfpa_partners.csv"
+    names = pd.read_csv(path).OrgName.dropna().to_list()
+    mapping = cluster_names(names)
+    dedup_report(names, mapping)
+    print(clusters_frame(mapping).to_string(index=False))
@@ -0,0 +1,196 @@
+import glob
+import os
+import re
+import sys
+import time
+from typing import Optional
+
+from lxml import etree, html as lxml_html
+
+RAW_DIR = "../data/raw/portal"
+# Committed portal-shaped pages, including one without a block for its year
+FIXTURE_DIR = "../data/fixtures/portal"
+
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# Compiled once and reused for every page
+PROGRAM_CHILDREN = etree.XPath(f".//div[{_has_class('program-child-wrapper')}]")
+PROGRAM_TITLE = etree.XPath(f".//div[{_has_class('program-parent-title')}]")
+PROGRAM_DATA = etree.XPath(f".//div[{_has_class('program-data-wrapper')}]")
+SPEC_KEYS = etree.XPath(f".//div[{_has_class('projects-project-spec-key')}]")
+SPEC_VALUE = etree.XPath(
+    f"following-sibling::div[{_has_class('projects-project-spec-value')}][1]"
+)
+SPANS = etree.XPath(".//span")
+TEXT = etree.XPath(".//text()")
+ORG_AMOUNTS = {
+    org: re.compile(rf"{org}\s*\$([\d,]+)") for org in ["UNFPA", "GOV", "NGO", "UN"]
+}
+SPEC_LABELS = ("Total Spending:", "Implemented by:", "Funded by:")
+
+
+def _get_text(element, strip=False) -> str:
+    """Same result as BeautifulSoup's get_text() / get_text(strip=True)."""
+    if strip:
+        return "".join(s.strip() for s in TEXT(element))
+    return "".join(TEXT(element))
+
+
+def _string(element):
+    """BeautifulSoup's Tag.string: the only text inside the tag, if there is one."""
+    while True:
+        children = list(element)
+        if not children:
+            return element.text
+        if len(children) > 1 or element.text or children[0].tail:
+            return None
+        element = children[0]
+
+
+def parse_data_element(element) -> dict:
+    """lxml twin of fundingScraper.parse_program_data_block."""
+    data = {
+        "Total Spending": 0,
+        "UNFPA": 0,
+        "GOV": 0,
+        "NGO": 0,
+        "UN": 0,
+        "Core Resources": 0.0,
+        "Non-core Resources": 0.0,
+    }
+
+    # First key div carrying each label, like soup.find(..., string=label)
+    specs = {}
+    for key in SPEC_KEYS(element):
+        label = _string(key)
+        if label in SPEC_LABELS and label not in specs:
+            values = SPEC_VALUE(key)
+            specs[label] = values[0] if values else None
+
+    value = specs.get("Total Spending:")
+    if value is not None:
+        value_text = _get_text(value, strip=True).replace("$", "").replace(",", "")
+        try:
+            data["Total Spending"] = int(float(value_text))
+        except ValueError:
+            pass
+
+    value = specs.get("Implemented by:")
+    if value is not None:
+        text = _get_text(value)
+        for org, pattern in ORG_AMOUNTS.items():
+            match = pattern.search(text)
+            if match:
+                data[org] = int(match.group(1).replace(",", ""))
+
+    value = specs.get("Funded by:")
+    if value is not None:
+        spans = SPANS(value)
+        for i in range(0, len(spans), 2):
+            try:
+                label = _get_text(spans[i], strip=True)
+                percent_text = (
+                    _get_text(spans[i + 1], strip=True)
+                    .replace("(", "")
+                    .replace(")", "")
+                    .replace("%", "")
+                )
+                percent = float(percent_text) / 100.0
+                if label in data:
+                    data[label] = percent
+            except (IndexError, ValueError):
+                continue
+
+    return data
+
+
+def parse_program_data_block(html_str) -> dict:
+    return parse_data_element(lxml_html.fromstring(html_str))
+
+
+def _year_wrapper(html, year):
+    tree = lxml_html.fromstring(html)
+    wrappers = tree.xpath(
+        "//div[@class=$cls]", cls=f"program-year-wrapper program-wrapper-{year}"
+    )
+    return wrappers[0] if wrappers else None
+
+
+def year_block(html, year) -> Optional[bytes]:
+    """Serialized program block for `year`, or None when the page has none."""
+    wrapper = _year_wrapper(html, year)
+    if wrapper is None:
+        return None
+    return etree.tostring(wrapper, encoding="utf-8", with_tail=False)
+
+
+def parse_portal_page(html, country, year) -> list:
+    """Program rows of one country page in a single lxml pass."""
+    year = str(year)
+    wrapper = _year_wrapper(html, year)
+    if wrapper is None:
+        return []
+
+    programs = []
+    for block in PROGRAM_CHILDREN(wrapper):
+        title = _get_text(PROGRAM_TITLE(block)[0], strip=True)
+        # Only the program total, not its sub-programs
+        data_dic = parse_data_element(PROGRAM_DATA(block)[0])
+        data_dic["Program"] = title
+        data_dic["Country"] = country
+        data_dic["Year"] = year
+        programs.append(data_dic)
+    return programs
+
+
+def benchmark(raw_dir=FIXTURE_DIR, repeat=3):
+    """
+    Compare against the BeautifulSoup parser on saved {country}_{year}.html
+    pages: the committed fixtures by default, or RAW_DIR after a scrape.
+    """
+    import fundingScraper
+
+    pages = []
+    for path in sorted(glob.glob(os.path.join(raw_dir, "*.html"))):
+        country, year = os.path.basename(path)[: -len(".html")].rsplit("_", 1)
+        with open(path, encoding="utf-8") as f:
+            pages.append((f.read(), country, year))
+    if not pages:
+        print(f"No saved pages in {raw_dir}")
+        return None
+
+    mismatches = [
+        (country, year)
+        for page, country, year in pages
+        if parse_portal_page(page, country, year)
+        != fundingScraper.parse_portal_page(page, country, year)
+    ]
+
+    timings = {}
+    for name, parse in [
+        ("bs4", fundingScraper.parse_portal_page),
+        ("lxml", parse_portal_page),
+    ]:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for page, country, year in pages:
+                parse(page, country, year)
+        timings[name] = (time.perf_counter() - start) / (repeat * len(pages))
+
+    print(
+        f"{len(pages)} pages: bs4 {timings['bs4'] * 1000:.1f} ms/page, "
+        f"lxml {timings['lxml'] * 1000:.1f} ms/page "
+        f"({timings['bs4'] / timings['lxml']:.1f}x faster), "
+        f"{len(mismatches)} mismatching pages"
+    )
+    for country, year in mismatches:
+        print(f"  mismatch: {country} {year}")
+    return timings
+
+
+if __name__ == "__main__":
+    # portalParser.py [pages_dir], e.g. ../data/raw/portal for scraped pages
+    benchmark(*sys.argv[1:2])
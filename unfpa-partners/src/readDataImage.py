@@ -5,11 +5,18 @@ import pandas as pd
 from openai import OpenAI
 from dotenv import load_dotenv
 from pydantic import BaseModel
+from llmCache import get_cache, print_stats
+from llmMeter import BudgetExceeded, metered, print_stats as print_llm_usage
+from imagePrep import prepare_image, prepare_pages
 
 # Load environment variables
 HOME_DIR = os.path.expanduser("~")
 load_dotenv(f"{HOME_DIR}/.env")
 DATA_DIR = "../data"
+# Crop, grayscale and downscale pages before they are sent to the model
+PREPROCESS_IMAGES = True
+# Split pages into overlapping row strips extracted concurrently (see tableTiles)
+TILED_EXTRACTION = False
 
 
 # Step 1: Define row-oriented structure
@@ -26,8 +33,8 @@ class TableData(BaseModel):
 
 
 # Step 2: OpenAI client
-def get_openai_client() -> OpenAI:
-    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+def get_openai_client():
+    return metered(OpenAI(api_key=os.getenv("OPENAI_API_KEY")), "readDataImage")
 
 
 # Step 3: Encode image
@@ -36,6 +43,13 @@ def encode_image_to_base64(image_path: str) -> str:
         return base64.b64encode(img_file.read()).decode("utf-8")
 
 
+def load_image_bytes(image_path: str, preprocess=PREPROCESS_IMAGES) -> bytes:
+    if preprocess:
+        return prepare_image(image_path)[0]
+    with open(image_path, "rb") as img_file:
+        return img_file.read()
+
+
 # Step 4: Prompt builder
 def build_vision_prompt(prompt: str, base64_image: str) -> list:
     return [
@@ -70,33 +84,67 @@ def get_default_prompt() -> str:
 
 
 # Step 6: Run GPT model and convert to DataFrame
-def parse_table_data_from_image(image_path: str, model_name="gpt-4o") -> pd.DataFrame:
-    client = get_openai_client()
-    base64_img = encode_image_to_base64(image_path)
+def parse_table_data_from_image(
+    image_path: str, model_name="gpt-4o", preprocess=PREPROCESS_IMAGES
+) -> pd.DataFrame:
+    image_bytes = load_image_bytes(image_path, preprocess)
+    return parse_table_data_from_bytes(image_bytes, model_name)
+
+
+def parse_table_data_from_bytes(image_bytes: bytes, model_name="gpt-4o") -> TableData:
     prompt = get_default_prompt()
-    messages = build_vision_prompt(prompt, base64_img)
 
-    completion = client.beta.chat.completions.parse(
-        model=model_name, messages=messages, temperature=0, response_format=TableData
-    )
+    def compute():
+        client = get_openai_client()
+        base64_img = base64.b64encode(image_bytes).decode("utf-8")
+        messages = build_vision_prompt(prompt, base64_img)
 
-    return completion.choices[0].message.parsed
+        completion = client.beta.chat.completions.parse(
+            model=model_name, messages=messages, temperature=0, response_format=TableData
+        )
 
+        return completion.choices[0].message.parsed
 
-def main():
-    for i in range(1, 46):
+    return get_cache().fetch(image_bytes, prompt, model_name, TableData, compute)
+
+
+def main(
+    preprocess=PREPROCESS_IMAGES,
+    tiled=TILED_EXTRACTION,
+    pages=range(1, 46),
+    data_dir="../data/unfpa_partners",
+    out_dir=None,
+):
+    out_dir = out_dir or data_dir
+    if tiled:
+        from tableTiles import parse_table_data_tiled
+    elif preprocess:
+        prepare_pages([f"{data_dir}/p{i}.png" for i in pages])
+
+    for i in pages:
         print(f"Processing file: p{i}.png")
         try:
-            image_path = f"../data/unfpa_partners/p{i}.png"
-            response = parse_table_data_from_image(image_path)
+            image_path = f"{data_dir}/p{i}.png"
+            if tiled:
+                response = parse_table_data_tiled(image_path, preprocess=preprocess)
+            else:
+                response = parse_table_data_from_image(
+                    image_path, preprocess=preprocess
+                )
             df = pd.DataFrame([row.model_dump() for row in response.rows])
 
-            df.to_csv(f"../data/unfpa_partners/p{i}.csv", index=False)
+            df.to_csv(f"{out_dir}/p{i}.csv", index=False)
 
+        except BudgetExceeded as e:
+            print(f"Stopping at p{i}.png: {e}")
+            break
         except Exception as e:
             print(f"Error processing file: p{i}.png. Exception: {e}")
             continue
 
+    print_stats()
+    print_llm_usage()
+
 
 def collectResults():
     datas = []
@@ -0,0 +1,100 @@
+import json
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+OK = "ok"
+NOT_FOUND = "not_found"
+ERROR = "error"
+FINISHED = (OK, NOT_FOUND)
+
+
+class RunJournal:
+    """
+    Append-only JSONL log of per-item outcomes for resumable batch runs.
+    Every record is flushed and fsynced as soon as it is written, so a crash
+    loses at most the item in flight. The latest record for a key wins;
+    delete the journal file to start a run from scratch.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.records = {}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn last line from a crash mid-write
+                        continue
+                    self.records[record["key"]] = record
+        self._file = open(path, "a", encoding="utf-8")
+
+    def record(self, key: str, status: str, result: dict = None, error: str = None):
+        record = {
+            "key": key,
+            "status": status,
+            "result": result,
+            "error": error,
+            "ts": time.time(),
+        }
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.records[key] = record
+
+    def status(self, key: str):
+        record = self.records.get(key)
+        return record["status"] if record else None
+
+    def pending(self, keys) -> list:
+        """Keys that have not finished yet (new or previously failed), deduplicated."""
+        seen = set()
+        todo = []
+        for key in keys:
+            if key in seen or self.status(key) in FINISHED:
+                continue
+            seen.add(key)
+            todo.append(key)
+        return todo
+
+    def result(self, key: str, field: str):
+        record = self.records.get(key)
+        if not record or not record["result"]:
+            return None
+        return record["result"].get(field)
+
+    def summary(self) -> dict:
+        counts = {OK: 0, NOT_FOUND: 0, ERROR: 0}
+        for record in self.records.values():
+            counts[record["status"]] = counts.get(record["status"], 0) + 1
+        return counts
+
+    def close(self):
+        self._file.close()
+
+
+def classify(result: dict, missing=("Not found", "", None)) -> str:
+    """OK when at least one field holds a real value, NOT_FOUND otherwise."""
+    if any(value not in missing for value in result.values()):
+        return OK
+    return NOT_FOUND
+
+
+def atomic_write_csv(df: pd.DataFrame, path: str):
+    """Write to a temp file in the target directory, then rename over `path`."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            df.to_csv(f, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
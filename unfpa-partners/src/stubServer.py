@@ -0,0 +1,448 @@
+import base64
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+FIXTURE_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "data", "fixtures"
+)
+# Query parameters never written to fixtures nor used in their keys
+SECRET_PARAMS = {"api_key", "key", "token"}
+# Headers that describe one connection or transfer, not the response
+HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "transfer-encoding",
+    "content-encoding",
+    "content-length",
+    "date",
+    "server",
+    "set-cookie",
+}
+
+
+# === Generic local server ===
+class StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops connects when a pool opens many at once
+    request_queue_size = 128
+
+
+@contextmanager
+def serve(handler_class, host="127.0.0.1", port=0):
+    """Run `handler_class` on a background thread and yield its base URL."""
+    server = StubHTTPServer((host, port), handler_class)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://{host}:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class JSONHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, keep-alive
+    # clients stall on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        return json.loads(body) if body else {}
+
+    def send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+# === Static site stand-in ===
+class SiteHandler(BaseHTTPRequestHandler):
+    """
+    Serves in-memory pages from `routes`: {path: (content_type, body, delay_s)}.
+    With `etag` set, pages carry an ETag and If-None-Match revalidation gets a 304.
+    """
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    routes = {}
+    etag = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        route = self.routes.get(self.path.split("?")[0])
+        if route is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        content_type, body, delay = route
+        time.sleep(delay)
+        data = body.encode("utf-8") if isinstance(body, str) else body
+        etag = f'"{hashlib.sha1(data).hexdigest()}"' if self.etag else None
+        if etag and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def site(routes: dict, etag: bool = True):
+    return serve(type("Site", (SiteHandler,), {"routes": routes, "etag": etag}))
+
+
+# === OpenAI stand-in ===
+def fake_from_schema(schema, defs=None, name="value"):
+    """Build a placeholder instance that validates against a JSON schema."""
+    defs = defs or schema.get("$defs", {})
+    if "$ref" in schema:
+        return fake_from_schema(defs[schema["$ref"].split("/")[-1]], defs, name)
+    if "anyOf" in schema:
+        options = [s for s in schema["anyOf"] if s.get("type") != "null"]
+        return fake_from_schema(options[0], defs, name) if options else None
+    kind = schema.get("type")
+    if isinstance(kind, list):
+        kind = next(k for k in kind if k != "null")
+    if kind == "object":
+        return {
+            key: fake_from_schema(prop, defs, key)
+            for key, prop in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        return [fake_from_schema(schema.get("items", {}), defs, name)]
+    if kind in ("integer", "number"):
+        return 0
+    if kind == "boolean":
+        return False
+    return f"stub {name}"
+
+
+def _response_schema(path, body):
+    if path.endswith("/responses"):
+        fmt = (body.get("text") or {}).get("format") or {}
+        return fmt.get("schema")
+    fmt = body.get("response_format") or {}
+    return (fmt.get("json_schema") or {}).get("schema")
+
+
+def _usage(body):
+    prompt_tokens = len(json.dumps(body)) // 4
+    return prompt_tokens, 50
+
+
+def responses_payload(body, text):
+    prompt_tokens, completion_tokens = _usage(body)
+    return {
+        "id": f"resp_{uuid.uuid4().hex}",
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": body.get("model", "stub"),
+        "status": "completed",
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": [],
+        "output": [
+            {
+                "type": "message",
+                "id": f"msg_{uuid.uuid4().hex}",
+                "role": "assistant",
+                "status": "completed",
+                "content": [{"type": "output_text", "text": text, "annotations": []}],
+            }
+        ],
+        "usage": {
+            "input_tokens": prompt_tokens,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens": completion_tokens,
+            "output_tokens_details": {"reasoning_tokens": 0},
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def chat_payload(body, text):
+    prompt_tokens, completion_tokens = _usage(body)
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [
+            {
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": text, "refusal": None},
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+class OpenAIStubHandler(JSONHandler):
+    """
+    Minimal stand-in for /v1/responses and /v1/chat/completions.
+    Answers structured-output requests with a placeholder matching the
+    requested schema; `latency` and `failure_rate` simulate a loaded API.
+    """
+
+    latency = 0.2
+    failure_rate = 0.0
+    failure_status = 429
+
+    def do_POST(self):
+        body = self.read_json()
+        time.sleep(self.latency)
+        if random.random() < self.failure_rate:
+            self.send_json(
+                self.failure_status,
+                {"error": {"message": "stub failure", "type": "stub_error"}},
+                headers={"retry-after": "0.1"},
+            )
+            return
+        schema = _response_schema(self.path, body)
+        text = json.dumps(fake_from_schema(schema)) if schema else "stub reply"
+        if self.path.endswith("/responses"):
+            self.send_json(200, responses_payload(body, text))
+        elif self.path.endswith("/chat/completions"):
+            self.send_json(200, chat_payload(body, text))
+        else:
+            self.send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+
+
+def openai_stub(latency=0.2, failure_rate=0.0, failure_status=429):
+    handler = type(
+        "OpenAIStub",
+        (OpenAIStubHandler,),
+        {
+            "latency": latency,
+            "failure_rate": failure_rate,
+            "failure_status": failure_status,
+        },
+    )
+    return serve(handler)
+
+
+# === Record / replay ===
+def _public_path(path: str) -> str:
+    """Request path with secret query parameters dropped and the rest sorted."""
+    parts = urlsplit(path)
+    query = sorted(
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k not in SECRET_PARAMS
+    )
+    return f"{parts.path}?{urlencode(query)}" if query else parts.path
+
+
+def fixture_key(method: str, path: str, body: bytes = b"") -> str:
+    try:
+        # JSON bodies are compared by content, not by key order or spacing
+        body = json.dumps(json.loads(body), sort_keys=True).encode("utf-8")
+    except ValueError:
+        pass
+    digest = hashlib.sha256(f"{method} {_public_path(path)}\n".encode("utf-8"))
+    digest.update(body)
+    return digest.hexdigest()
+
+
+class Cassette:
+    """Recorded exchanges with one upstream, one JSON line per request."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    entry = json.loads(line)
+                    self.entries[entry["key"]] = entry
+
+    def get(self, key: str):
+        return self.entries.get(key)
+
+    def add(self, key, method, path, status, headers, body: bytes, latency):
+        entry = {
+            "key": key,
+            "method": method,
+            "path": _public_path(path),
+            "status": status,
+            "headers": headers,
+            "latency": round(latency, 4),
+        }
+        try:
+            entry["body"] = body.decode("utf-8")
+        except UnicodeDecodeError:
+            entry["body_base64"] = base64.b64encode(body).decode("ascii")
+        with self._lock:
+            self.entries[key] = entry
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._lock:
+            with open(f"{self.path}.tmp", "w", encoding="utf-8") as f:
+                for key in sorted(self.entries):
+                    f.write(json.dumps(self.entries[key]) + "\n")
+        os.replace(f"{self.path}.tmp", self.path)
+
+
+def _entry_body(entry) -> bytes:
+    if "body_base64" in entry:
+        return base64.b64decode(entry["body_base64"])
+    return entry["body"].encode("utf-8")
+
+
+class _ExchangeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def send_exchange(self, status, headers, body: bytes):
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.handle_exchange()
+
+    def do_POST(self):
+        self.handle_exchange()
+
+
+class RecordingProxyHandler(_ExchangeHandler):
+    """Forwards every request to `upstream` and records the exchange in `cassette`."""
+
+    upstream = ""
+    cassette = None
+    timeout = 600
+
+    def handle_exchange(self):
+        body = self.read_body()
+        headers = {
+            k: v
+            for k, v in self.headers.items()
+            if k.lower() not in HOP_HEADERS | {"host", "accept-encoding"}
+        }
+        request = urllib.request.Request(
+            self.upstream + self.path,
+            data=body or None,
+            headers={**headers, "Accept-Encoding": "identity"},
+            method=self.command,
+        )
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                status, reply_headers, data = (
+                    response.status,
+                    response.headers,
+                    response.read(),
+                )
+        except urllib.error.HTTPError as e:
+            status, reply_headers, data = e.code, e.headers, e.read()
+        latency = time.perf_counter() - start
+        reply_headers = {
+            k: v for k, v in reply_headers.items() if k.lower() not in HOP_HEADERS
+        }
+        key = fixture_key(self.command, self.path, body)
+        self.cassette.add(
+            key, self.command, self.path, status, reply_headers, data, latency
+        )
+        self.send_exchange(status, reply_headers, data)
+
+
+class ReplayHandler(_ExchangeHandler):
+    """
+    Answers from `cassette` only. Each reply waits `latency` seconds, or the
+    latency seen while recording when it is None; unknown requests get a 404.
+    """
+
+    cassette = None
+    latency = None
+
+    def handle_exchange(self):
+        entry = self.cassette.get(
+            fixture_key(self.command, self.path, self.read_body())
+        )
+        if entry is None:
+            message = f"no fixture for {self.command} {_public_path(self.path)}"
+            data = json.dumps({"error": {"message": message}}).encode("utf-8")
+            self.send_exchange(404, {"Content-Type": "application/json"}, data)
+            return
+        time.sleep(entry["latency"] if self.latency is None else self.latency)
+        self.send_exchange(entry["status"], entry["headers"], _entry_body(entry))
+
+
+@contextmanager
+def record(upstream: str, cassette_path: str):
+    """Proxy to `upstream` (e.g. https://api.openai.com); fixtures are saved on exit."""
+    cassette = Cassette(cassette_path)
+    handler = type(
+        "Recorder",
+        (RecordingProxyHandler,),
+        {"upstream": upstream.rstrip("/"), "cassette": cassette},
+    )
+    try:
+        with serve(handler) as url:
+            yield url
+    finally:
+        cassette.save()
+
+
+def replay(cassette_path: str, latency=None):
+    if not os.path.exists(cassette_path):
+        raise FileNotFoundError(f"No recorded fixtures at {cassette_path}")
+    handler = type(
+        "Replay",
+        (ReplayHandler,),
+        {"cassette": Cassette(cassette_path), "latency": latency},
+    )
+    return serve(handler)
+
+
+if __name__ == "__main__":
+    # Point the scripts at the stub with OPENAI_BASE_URL=http://127.0.0.1:8765/v1
+    server = StubHTTPServer(("127.0.0.1", 8765), OpenAIStubHandler)
+    print("OpenAI stub listening on http://127.0.0.1:8765/v1")
+    server.serve_forever()
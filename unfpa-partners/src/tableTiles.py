@@ -0,0 +1,184 @@
+import io
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+from imagePrep import preprocess_image
+from llmCache import get_cache
+from readDataImage import PREPROCESS_IMAGES, TableData, parse_table_data_from_bytes
+
+ROWS_PER_STRIP = 8
+OVERLAP_ROWS = 1
+MAX_WORKERS = 8
+
+# Row detection settings
+INK_LEVEL = 235  # pixels darker than this count as ink (grid lines are light grey)
+RULE_COVERAGE = 0.8  # share of the width a horizontal rule has to span
+MIN_ROW_HEIGHT = 8
+MIN_CELL_BORDERS = 4  # table rows are crossed by the column separators
+
+
+def detect_table_rows(image: Image.Image) -> list:
+    """
+    Return (top, bottom) pixel bands of the data rows of a table page.
+    Rows are the gaps between horizontal rules that are also crossed by
+    the vertical column borders, which skips the page title and the grey
+    separator bars between countries.
+    """
+    pixels = np.asarray(image.convert("L"))
+    ink = pixels < INK_LEVEL
+    rule_lines = np.flatnonzero(ink.mean(axis=1) > RULE_COVERAGE)
+
+    # Merge adjacent rule lines into [start, end] groups
+    rules = []
+    for y in rule_lines:
+        if rules and y - rules[-1][1] <= 1:
+            rules[-1][1] = y
+        else:
+            rules.append([y, y])
+
+    rows = []
+    for above, below in zip(rules, rules[1:]):
+        top, bottom = above[1] + 1, below[0]
+        if bottom - top < MIN_ROW_HEIGHT:
+            continue
+        full_height = ink[top:bottom].all(axis=0).astype(int)
+        borders = np.count_nonzero(np.diff(full_height) == 1)
+        if borders >= MIN_CELL_BORDERS:
+            rows.append((int(top), int(bottom)))
+    return rows
+
+
+def split_into_strips(
+    image: Image.Image, rows_per_strip=ROWS_PER_STRIP, overlap=OVERLAP_ROWS
+) -> list:
+    """Crop overlapping horizontal strips that start and end on row boundaries."""
+    rows = detect_table_rows(image)
+    if len(rows) <= rows_per_strip:
+        return [image]
+
+    strips = []
+    start = 0
+    while start < len(rows):
+        end = min(start + rows_per_strip, len(rows))
+        top = rows[max(start - overlap, 0)][0]
+        bottom = rows[end - 1][1]
+        strips.append(image.crop((0, top, image.width, bottom)))
+        start = end
+    return strips
+
+
+def _strip_bytes(strip: Image.Image, preprocess: bool) -> bytes:
+    buffer = io.BytesIO()
+    strip.save(buffer, format="PNG")
+    data = buffer.getvalue()
+    return preprocess_image(data) if preprocess else data
+
+
+def normalize_key(org_name, amount) -> tuple:
+    org = re.sub(r"[^a-z0-9]", "", str(org_name).lower())
+    amount = re.sub(r"[^0-9.]", "", str(amount))
+    try:
+        amount = f"{float(amount):.2f}"
+    except ValueError:
+        pass
+    return org, amount
+
+
+def row_key(row) -> tuple:
+    return normalize_key(row.OrgName, row.Amount)
+
+
+def stitch_rows(strip_tables: list, overlap=OVERLAP_ROWS) -> TableData:
+    """Concatenate strip results, dropping rows repeated in the overlap."""
+    rows = []
+    for table in strip_tables:
+        # Only the tail of the previous strip can contain the overlap rows
+        recent = {row_key(row) for row in rows[-(overlap + 1) :]} if rows else set()
+        for i, row in enumerate(table.rows):
+            if i <= overlap and row_key(row) in recent:
+                continue
+            rows.append(row)
+    return TableData(rows=rows)
+
+
+def parse_table_data_tiled(
+    image_path: str,
+    model_name="gpt-4o",
+    preprocess=PREPROCESS_IMAGES,
+    rows_per_strip=ROWS_PER_STRIP,
+    overlap=OVERLAP_ROWS,
+) -> TableData:
+    image = Image.open(image_path)
+    strips = split_into_strips(image, rows_per_strip, overlap)
+    payloads = [_strip_bytes(strip, preprocess) for strip in strips]
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        tables = list(
+            pool.map(
+                lambda data: parse_table_data_from_bytes(data, model_name), payloads
+            )
+        )
+    return stitch_rows(tables, overlap)
+
+
+# === Benchmark ===
+def row_recall(table: TableData, truth: pd.DataFrame) -> float:
+    expected = {
+        normalize_key(org, amt) for org, amt in zip(truth.OrgName, truth.Amount)
+    }
+    found = {row_key(row) for row in table.rows}
+    return len(expected & found) / len(expected) if expected else 1.0
+
+
+def benchmark(pages=range(1, 46), model_name="gpt-4o"):
+    """
+    Compare whole-page and tiled extraction on wall-clock time and row recall,
+    using the current p{i}.csv files as the reference rows.
+    """
+    from readDataImage import parse_table_data_from_image
+
+    cache = get_cache()
+    mode, cache.mode = cache.mode, "bypass"
+    results = []
+    try:
+        for i in pages:
+            image_path = f"../data/unfpa_partners/p{i}.png"
+            truth = pd.read_csv(f"../data/unfpa_partners/p{i}.csv")
+
+            start = time.perf_counter()
+            whole = parse_table_data_from_image(image_path, model_name)
+            whole_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            tiled = parse_table_data_tiled(image_path, model_name)
+            tiled_time = time.perf_counter() - start
+
+            results.append(
+                {
+                    "page": i,
+                    "rows": len(truth),
+                    "strips": len(split_into_strips(Image.open(image_path))),
+                    "whole_s": round(whole_time, 2),
+                    "tiled_s": round(tiled_time, 2),
+                    "whole_recall": round(row_recall(whole, truth), 3),
+                    "tiled_recall": round(row_recall(tiled, truth), 3),
+                }
+            )
+            print(results[-1])
+    finally:
+        cache.mode = mode
+
+    df = pd.DataFrame(results)
+    print(df[["whole_s", "tiled_s", "whole_recall", "tiled_recall"]].describe())
+    return df
+
+
+if __name__ == "__main__":
+    # python tableTiles.py [page ...]
+    pages = [int(p) for p in sys.argv[1:]] or range(1, 46)
+    benchmark(pages)
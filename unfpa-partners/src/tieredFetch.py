@@ -0,0 +1,178 @@
+import asyncio
+import json
+import os
+import re
+from collections import Counter
+from typing import Awaitable, Callable, Optional
+from urllib.parse import urlparse
+
+import requests
+from playwright.async_api import Page
+from requests.adapters import HTTPAdapter
+
+from browserPool import READINESS, BrowserPool, block_resources, load_page
+
+DECISIONS_PATH = "../data/interim/fetch_tiers.json"
+HTTP_TIMEOUT = 20
+# Without markers, a page needs this much visible text to count as rendered
+MIN_TEXT_CHARS = 200
+# Answers that mean there is nothing to render, not that rendering is needed
+NOT_FOUND = {404, 410}
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+)
+
+
+def route_key(url: str) -> str:
+    """Group URLs by host and path pattern, e.g. www.unfpa.org/data/transparency-portal/*."""
+    parsed = urlparse(url)
+    segments = [s for s in parsed.path.split("/") if s]
+    if len(segments) > 1:
+        pattern = "/".join(segments[:-1]) + "/*"
+    else:
+        pattern = "/".join(segments)
+    return f"{parsed.netloc}/{pattern}"
+
+
+def visible_text(html: str) -> str:
+    html = re.sub(r"(?is)<(script|style|noscript|template)\b.*?</\1>", " ", html)
+    return " ".join(re.sub(r"(?s)<[^>]*>", " ", html).split())
+
+
+def has_markers(html: str, markers) -> bool:
+    """All markers present; with no markers, any page with real body text passes."""
+    if not markers:
+        return len(visible_text(html)) >= MIN_TEXT_CHARS
+    return all(re.search(marker, html) for marker in markers)
+
+
+class TieredFetcher:
+    """
+    Fetch pages over plain HTTP first and escalate to headless Chromium only
+    when the expected content markers are missing from the static HTML.
+    Escalations are remembered per host/path pattern, so later URLs of the
+    same kind go straight to the browser.
+    """
+
+    def __init__(
+        self,
+        markers=(),
+        pool: Optional[BrowserPool] = None,
+        decisions_path: str = DECISIONS_PATH,
+        readiness: str = READINESS,
+        selector: Optional[str] = None,
+        browser_fetch: Optional[Callable[[Page, str], Awaitable[str]]] = None,
+        is_empty: Optional[Callable[[str, str], bool]] = None,
+    ):
+        self.markers = list(markers)
+        self.browser_fetch = browser_fetch
+        self.is_empty = is_empty
+        self.pool = pool
+        self._pool_lock = asyncio.Lock()
+        self.decisions_path = decisions_path
+        self.readiness = readiness
+        self.selector = selector
+        self.tiers = Counter()
+        self.decisions = {}
+        if os.path.exists(decisions_path):
+            with open(decisions_path, encoding="utf-8") as f:
+                self.decisions = json.load(f)
+
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _remember(self, key: str, tier: str):
+        if self.decisions.get(key) == tier:
+            return
+        self.decisions[key] = tier
+        os.makedirs(os.path.dirname(self.decisions_path) or ".", exist_ok=True)
+        with open(self.decisions_path, "w", encoding="utf-8") as f:
+            json.dump(self.decisions, f, indent=2, sort_keys=True)
+
+    def _http_get(self, url: str) -> tuple:
+        """(status, html); status is None when the request itself failed."""
+        try:
+            response = self.session.get(url, timeout=HTTP_TIMEOUT)
+        except requests.RequestException:
+            return None, None
+        return response.status_code, response.text
+
+    async def _start_pool(self) -> BrowserPool:
+        # The browser is only started once some page actually needs it, and
+        # concurrent escalations wait here for that single start
+        async with self._pool_lock:
+            if self.pool is None:
+                self.pool = BrowserPool(on_context=block_resources)
+            await self.pool.start()
+        return self.pool
+
+    async def _browser_get(self, url: str) -> str:
+        await self._start_pool()
+        async with self.pool.slot() as slot:
+            if self.browser_fetch:
+                return await self.browser_fetch(slot.page, url)
+            html, _ = await load_page(slot.page, url, self.readiness, self.selector)
+        return html
+
+    async def fetch(self, url: str, markers=None) -> str:
+        """
+        Page HTML; an empty string when the server answers 404/410 or
+        `is_empty` says the static page has no data, since a browser would
+        only time out waiting for content that is not there.
+        """
+        markers = self.markers if markers is None else list(markers)
+        key = route_key(url)
+
+        # Only a 200 without the markers says the route needs a browser; a
+        # timeout, connection error or 5xx falls back for this URL alone
+        static_miss = False
+        if self.decisions.get(key) != "browser":
+            status, html = await asyncio.to_thread(self._http_get, url)
+            if status in NOT_FOUND or (
+                status == 200 and self.is_empty and self.is_empty(url, html)
+            ):
+                self.tiers["empty"] += 1
+                return ""
+            if status == 200 and has_markers(html, markers):
+                self.tiers["http"] += 1
+                self._remember(key, "http")
+                return html
+            static_miss = status == 200
+            self.tiers["escalated"] += 1
+
+        html = await self._browser_get(url)
+        self.tiers["browser"] += 1
+        if static_miss and has_markers(html, markers):
+            self._remember(key, "browser")
+        return html
+
+    async def fetch_many(self, urls, markers=None) -> list:
+        return await asyncio.gather(
+            *(self.fetch(url, markers) for url in urls), return_exceptions=True
+        )
+
+    def report(self) -> dict:
+        total = self.tiers["http"] + self.tiers["browser"]
+        stats = {
+            "pages": total,
+            "http": self.tiers["http"],
+            "browser": self.tiers["browser"],
+            "escalated": self.tiers["escalated"],
+            "empty": self.tiers["empty"],
+            "http_share": round(self.tiers["http"] / total, 3) if total else 0.0,
+        }
+        print(
+            f"Fetch tiers: {stats['http']} http, {stats['browser']} browser "
+            f"({stats['escalated']} escalated, {stats['empty']} without data), "
+            f"{stats['http_share']:.0%} served without a browser"
+        )
+        return stats
+
+    async def close(self):
+        self.session.close()
+        if self.pool:
+            await self.pool.close()
@@ -0,0 +1,127 @@
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+import pandas as pd
+from PIL import Image
+
+from countries import to_slug
+from dataCatalog import DATA_DIR, parse_amount
+from llmCache import get_cache
+from runJournal import atomic_write_csv
+from tableTiles import detect_table_rows
+
+PAGES_DIR = os.path.join(DATA_DIR, "unfpa_partners")
+REPORT_PATH = os.path.join(DATA_DIR, "interim", "page_scores.csv")
+PAGES = range(1, 46)
+
+COLUMNS = ["Country", "OrgName", "OrgType", "Description", "Amount"]
+ORG_TYPES = {"NGO", "Government", "UN"}
+# Regional offices and HQ units fund partners too; they are not countries
+OFFICE_PATTERN = re.compile(r"\b(?:Office|Branch|Division|Unit)$")
+# Pages scoring below this are queued for re-extraction
+THRESHOLD = 0.98
+
+
+# === Checks ===
+def check_page(df: pd.DataFrame, expected_rows: int) -> dict:
+    """
+    Share of rows passing each check, each between 0 and 1. The page score is
+    the lowest of them, so one bad column is enough to queue the page.
+    """
+    if df is None or df.empty or list(df.columns) != COLUMNS:
+        return {"rows": 0 if df is None else len(df), "score": 0.0}
+    rows = len(df)
+    countries = df.Country.astype("string")
+    known = to_slug(countries).notna() | countries.str.contains(OFFICE_PATTERN)
+    checks = {
+        "amounts": parse_amount(df.Amount).gt(0).mean(),
+        "org_types": df.OrgType.isin(ORG_TYPES).mean(),
+        "countries": known.fillna(False).mean(),
+        "row_count": min(rows, expected_rows) / max(rows, expected_rows, 1),
+    }
+    checks = {name: round(float(value), 3) for name, value in checks.items()}
+    return {"rows": rows, **checks, "score": min(checks.values())}
+
+
+def read_page(path: str):
+    try:
+        return pd.read_csv(path, dtype=str)
+    except (FileNotFoundError, pd.errors.EmptyDataError):
+        return None
+
+
+def score_page(i: int, csv_dir=PAGES_DIR, image_dir=PAGES_DIR) -> dict:
+    expected = len(detect_table_rows(Image.open(f"{image_dir}/p{i}.png")))
+    result = check_page(read_page(f"{csv_dir}/p{i}.csv"), expected)
+    return {"page": i, "expected_rows": expected, **result}
+
+
+def validate(pages=PAGES, threshold=THRESHOLD, csv_dir=PAGES_DIR) -> pd.DataFrame:
+    """Score every page and flag the ones to re-extract."""
+    df = pd.DataFrame([score_page(i, csv_dir) for i in pages])
+    df["queued"] = df.score < threshold
+    return df
+
+
+def save_report(df: pd.DataFrame, path=REPORT_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    atomic_write_csv(df, path)
+
+
+# === Re-extraction ===
+def reextract(pages, tiled=True, threshold=THRESHOLD) -> pd.DataFrame:
+    """
+    Re-run extraction for `pages` only, skipping cached responses. Results go
+    to a scratch directory and replace p{i}.csv only when they score higher.
+    Tiled extraction is the default here since dropped rows are the usual failure.
+    """
+    from readDataImage import main as extract
+
+    pages = list(pages)
+    before = validate(pages, threshold).set_index("page")
+    cache = get_cache()
+    mode, cache.mode = cache.mode, "refresh"
+    out_dir = tempfile.mkdtemp()
+    try:
+        extract(tiled=tiled, pages=pages, data_dir=PAGES_DIR, out_dir=out_dir)
+        after = validate(pages, threshold, csv_dir=out_dir).set_index("page")
+        after["replaced"] = after.score > before.score
+        for i in after.index[after.replaced]:
+            shutil.copyfile(f"{out_dir}/p{i}.csv", f"{PAGES_DIR}/p{i}.csv")
+    finally:
+        cache.mode = mode
+        shutil.rmtree(out_dir, ignore_errors=True)
+    after["previous_score"] = before.score
+    return after.reset_index()
+
+
+def print_report(df: pd.DataFrame, max_rows=10):
+    """The whole report when short, else only the queued pages; the summary counts all."""
+    shown = df if len(df) <= max_rows else df[df.queued]
+    with pd.option_context("display.width", 200, "display.max_rows", None):
+        print(shown.to_string(index=False))
+    print(f"{int(df.queued.sum())} of {len(df)} pages below threshold")
+
+
+if __name__ == "__main__":
+    # validatePages.py [page ...] [--threshold X] [--rerun]
+    args = sys.argv[1:]
+    threshold = THRESHOLD
+    if "--threshold" in args:
+        threshold = float(args.pop(args.index("--threshold") + 1))
+        args.remove("--threshold")
+    pages = [int(a) for a in args if not a.startswith("--")] or PAGES
+
+    report = validate(pages, threshold)
+    print_report(report)
+    if "--rerun" in args and report.queued.any():
+        rerun = reextract(report.loc[report.queued, "page"], threshold=threshold)
+        print_report(rerun)
+        kept = rerun.replaced.to_numpy()
+        replaced = rerun[kept][report.columns]
+        report = pd.concat([report[~report.page.isin(replaced.page)], replaced])
+        report = report.sort_values("page")
+    save_report(report)